@@ -0,0 +1,98 @@
+import numpy as np
+
+#reserve prices 900..999, with (reserve - 900) agents at each one like the r1/r4 scripts assumed
+def reserve_distribution(low=900, high=1000):
+    prices = np.arange(low, high)
+    return prices, (prices - low).astype(float)
+
+#number of agents with reserve price strictly below each x
+def agents_below(x, prices, weights):
+    cumulative = np.concatenate(([0.0], np.cumsum(weights)))
+    return cumulative[np.searchsorted(prices, x, side="left")]
+
+#pnl of every (lower, upper) bid pair at once, rows = lower bids, columns = upper bids
+#pairs with lower > upper are nan
+#average = what everyone else bids with their upper bid (r4 rule), None for the r1 rules
+def bid_pnl_matrix(lower_bids, upper_bids, prices=None, weights=None, value=1000, average=None):
+    if prices is None:
+        prices, weights = reserve_distribution()
+    lower = np.asarray(lower_bids, dtype=float)[:, None]
+    upper = np.asarray(upper_bids, dtype=float)[None, :]
+    below_lower = agents_below(lower, prices, weights)
+    below_upper = agents_below(upper, prices, weights)
+
+    #agents under the lower bid sell to us at the lower bid, the rest under the upper bid at the upper bid
+    upper_margin = np.broadcast_to(value - upper, below_upper.shape).copy()
+    if average is not None:
+        #upper bids under the average only get filled with probability (1000-avg)/(1000-bid)
+        upper_margin = np.where(upper < average, value - average, upper_margin)
+    pnl = (value - lower) * below_lower + upper_margin * np.maximum(below_upper - below_lower, 0)
+    return np.where(lower <= upper, pnl, np.nan)
+
+#(profit, lower, upper) of the best pair, ties go to the first one like the old loops
+def best_bids(lower_bids, upper_bids, **kwargs):
+    pnl = bid_pnl_matrix(lower_bids, upper_bids, **kwargs)
+    i, j = np.unravel_index(np.argmax(np.nan_to_num(pnl, nan=-np.inf)), pnl.shape)
+    return pnl[i, j], lower_bids[i], upper_bids[j]
+
+#best sequence of exactly n_trades currency swaps starting and ending in `start`
+#bellman-ford style relaxation where round k only allows paths with k edges, in log space so products become sums
+def best_exchange_cycle(rates, start, n_trades):
+    log_rates = np.log(np.asarray(rates, dtype=float))
+    n = len(log_rates)
+    best = np.full(n, -np.inf)
+    best[start] = 0.0
+    parents = []
+    for _ in range(n_trades):
+        candidates = best[:, None] + log_rates
+        parents.append(np.argmax(candidates, axis=0))
+        best = np.max(candidates, axis=0)
+
+    path = [start]
+    for parent in reversed(parents):
+        path.append(parent[path[-1]])
+    path.reverse()
+
+    #multiply the actual rates back out, exp(sum of logs) loses the last few digits
+    multiplier = 1.0
+    for a, b in zip(path, path[1:]):
+        multiplier *= rates[a][b]
+    return multiplier, path
+
+#bellman-ford negative cycle check on -log(rate): True if some loop of swaps makes money
+def has_arbitrage(rates):
+    weights = -np.log(np.asarray(rates, dtype=float))
+    n = len(weights)
+    dist = np.zeros(n)
+    for _ in range(n - 1):
+        dist = np.minimum(dist, np.min(dist[:, None] + weights, axis=0))
+    return bool(np.any(np.min(dist[:, None] + weights, axis=0) < dist - 1e-12))
+
+#r4 with an uncertain crowd average: the upper bid margin is (value-u) if avg <= u else (value-avg),
+#so pnl = lower part + (agents between the bids) * margin(u, avg) and only the margin depends on avg.
+#mean/std of the margin per upper bid over the sampled averages gives the whole surface in one go
+def expected_bid_pnl(lower_bids, upper_bids, averages, prices=None, weights=None, value=1000):
+    if prices is None:
+        prices, weights = reserve_distribution()
+    averages = np.asarray(averages, dtype=float)
+    lower = np.asarray(lower_bids, dtype=float)[:, None]
+    upper = np.asarray(upper_bids, dtype=float)[None, :]
+    below_lower = agents_below(lower, prices, weights)
+    between = np.maximum(agents_below(upper, prices, weights) - below_lower, 0)
+
+    #(averages x upper bids) is tiny, even for 100k samples it's 10M floats at most
+    margin = np.where(averages[:, None] > upper, value - averages[:, None], value - upper)
+    margin_mean = margin.mean(axis=0)[None, :]
+    margin_std = margin.std(axis=0)[None, :]
+
+    valid = lower <= upper
+    mean = np.where(valid, (value - lower) * below_lower + between * margin_mean, np.nan)
+    std = np.where(valid, between * margin_std, np.nan)
+    return mean, std
+
+#pnl can only go down as the average goes up, so the q-quantile of pnl is the pnl at the (1-q)-quantile average
+def bid_pnl_quantile(lower_bids, upper_bids, averages, q, **kwargs):
+    return bid_pnl_matrix(lower_bids, upper_bids, average=np.quantile(averages, 1 - q), **kwargs)
+
+def sample_averages(n, rng, mean=979, std=5, low=900, high=999):
+    return np.clip(rng.normal(mean, std, size=n), low, high)
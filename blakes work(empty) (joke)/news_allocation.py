@@ -0,0 +1,68 @@
+import numpy as np
+
+#r5 rules: 750k capital, putting x% into a product makes 750000 * x/100 * return and costs 90 * x^2 in fees,
+#shorts are negative x, and the sum of |x| over all products can't go over 100%
+CAPITAL = 750000
+FEE = 90
+BUDGET = 100
+
+#pnl of allocation x (percent per product) for returns r, both can be (..., products) arrays
+def allocation_pnl(x, returns):
+    x = np.asarray(x, dtype=float)
+    return CAPITAL / 100 * np.sum(x * returns, axis=-1) - FEE * np.sum(x ** 2, axis=-1)
+
+#best allocation for expected returns r
+#per product the optimum is x = 7500 r / 180 (the 75e4/180e2 in the r5 script), if that blows the budget
+#the KKT solution is the same thing soft-thresholded: x = sign(r) * max(|7500 r| - lam, 0) / 180,
+#lam found by sorting like a projection onto the L1 ball
+def solve_allocation(expected_returns, budget=BUDGET):
+    r = np.asarray(expected_returns, dtype=float)
+    gain = CAPITAL / 100 * np.abs(r)
+    x = gain / (2 * FEE)
+    if x.sum() <= budget:
+        return np.sign(r) * x
+
+    #largest lam with sum(max(gain - lam, 0)) / (2 * FEE) = budget
+    g = np.sort(gain)[::-1]
+    k = np.arange(1, len(g) + 1)
+    lam_k = (np.cumsum(g) - 2 * FEE * budget) / k
+    active = np.flatnonzero(g > lam_k)[-1]
+    lam = lam_k[active]
+    return np.sign(r) * np.maximum(gain - lam, 0) / (2 * FEE)
+
+#the exchange only takes whole percents: round, then take 1% back off whichever product loses least until it fits
+def round_allocation(x, expected_returns, budget=BUDGET):
+    r = np.asarray(expected_returns, dtype=float)
+    xi = np.round(x).astype(int)
+    while np.abs(xi).sum() > budget:
+        step = -np.sign(xi)
+        loss = allocation_pnl(xi, r) - np.array([allocation_pnl(xi + step * (np.arange(len(xi)) == i), r) for i in range(len(xi))])
+        loss[xi == 0] = np.inf
+        i = int(np.argmin(loss))
+        xi[i] += step[i]
+    return xi
+
+#samples (n x products) of returns, each product either a fixed number, a tuple (mean, std) for a normal,
+#or a list/array of equally likely outcomes (any length, so [-0.1, 0.1] is two outcomes, not a normal)
+def sample_returns(table, n, rng):
+    cols = []
+    for name, spec in table.items():
+        if np.ndim(spec) == 0:
+            cols.append(np.full(n, float(spec)))
+        elif isinstance(spec, tuple):
+            if len(spec) != 2:
+                raise ValueError("{}: a tuple is (mean, std), got {}".format(name, spec))
+            cols.append(rng.normal(spec[0], spec[1], size=n))
+        else:
+            cols.append(rng.choice(np.asarray(spec, dtype=float), size=n))
+    return np.stack(cols, axis=1)
+
+#solve on the expected returns of the table, then monte carlo the pnl of that allocation
+def allocate(table, n_samples=100_000, seed=0, integer=True):
+    rng = np.random.default_rng(seed)
+    samples = sample_returns(table, n_samples, rng)
+    expected = samples.mean(axis=0)
+    x = solve_allocation(expected)
+    if integer:
+        x = round_allocation(x, expected)
+    return dict(zip(table, x)), allocation_pnl(x, samples)
@@ -1,19 +1,7 @@
-max_profit = 0
-max_upper_bid = 0
-max_lower_bid = 0
-for lower_bid in range(900, 1000):
-    for upper_bid in range(lower_bid, 1000):
-        profit = 0
-        for reserved_price in range(900, 1000):
-            for number_of_agents in range(reserved_price-900):
-                price = 1000
-                if lower_bid > reserved_price:
-                    price = lower_bid
-                elif upper_bid > reserved_price:
-                    price = upper_bid
-                profit += 1000 - price
-        if profit > max_profit:
-            max_profit = profit
-            max_upper_bid = upper_bid
-            max_lower_bid = lower_bid
-print(max_profit, max_upper_bid, max_lower_bid)
\ No newline at end of file
+from manual_optimizer import best_bids
+import numpy as np
+
+#closed form pnl over the reserve price distribution for every (lower_bid, upper_bid) pair at once
+bids = np.arange(900, 1000)
+max_profit, max_lower_bid, max_upper_bid = best_bids(bids, bids)
+print(int(max_profit), max_upper_bid, max_lower_bid)
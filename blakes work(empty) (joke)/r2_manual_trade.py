@@ -1,14 +1,9 @@
-max_profit = 0
-max_trades = []
+from manual_optimizer import best_exchange_cycle
 exchange = [[1, 0.48, 1.52, 0.71], [2.05, 1, 3.26, 1.56], [0.64, 0.3, 1, 0.46], [1.41, 0.61, 2.08, 1]]
 products = ["pizza", "wasabi", "snowball", "shells"]
 capital = 2e6
-for first in range(len(exchange)):
-    for second in range(len(exchange)):
-        for third in range(len(exchange)):
-            for fourth in range(len(exchange)):
-                profit = capital * exchange[3][first] * exchange[first][second] * exchange[second][third] * exchange[third][fourth] * exchange[fourth][3]
-                if profit > max_profit:
-                    max_profit = profit
-                    max_trades = [first, second, third, fourth]
+#start and end in shells with 4 currencies in between, i.e. 5 trades
+multiplier, path = best_exchange_cycle(exchange, 3, 5)
+max_profit = capital * multiplier
+max_trades = path[1:-1]
 print(max_profit, [products[i] for i in max_trades])
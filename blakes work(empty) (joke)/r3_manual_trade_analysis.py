@@ -1,4 +1,6 @@
 import matplotlib.pyplot as plt
+import time
+from treasure_map import simulate, rank_choices
 mults = [24, 70, 41, 21, 60, 47, 82, 87, 80, 35, 73, 89, 100, 90, 17, 77, 83, 85, 79, 55, 12, 27, 52, 15, 30]
 hunters = [2, 4, 3, 2, 4, 3, 5, 5, 5, 3, 4, 5, 8, 7, 2, 5, 5, 5, 5, 4, 2, 3, 4, 2, 3]
 values = [i/j for i, j in zip(mults, hunters)]
@@ -11,7 +13,17 @@ for i in range(len(values)):
         altered.append(mults[i]/hunters[i])
 for i in range(len(values)):
     print("{: ^10} {: ^20} {: ^20}".format(mults[i], values[i], altered[i]))
+#This code assumes people choose values with a step distribution above a certain threshold. Our choices for this ended up being 52 and 100. 52 was the top tile, 100 was around the middle.
+
+#Monte Carlo over a million crowds (logit, step and proportional with random parameters + noise) instead of one guess
+start = time.time()
+mean, cov = simulate(1_000_000)
+print("simulated in {:.2f}s".format(time.time() - start))
+print("{: ^16} {: ^16} {: ^16}".format("tiles", "expected pnl", "std"))
+for tiles, pnl, std in rank_choices(mean, cov)[:10]:
+    print("{: ^16} {: ^16.0f} {: ^16.0f}".format(str([mults[t] for t in tiles]), pnl, std))
+
 plt.plot(mults, values, 'ro')
 plt.plot(mults, altered, 'bo')
+plt.plot(mults, mean / 7500, 'go')
 plt.show()
-#This code assumes people choose values with a step distribution above a certain threshold. Our choices for this ended up being 52 and 100. 52 was the top tile, 100 was around the middle.
@@ -1,36 +1,27 @@
 #adapted from r1
+from manual_optimizer import best_bids, bid_pnl_matrix, expected_bid_pnl, bid_pnl_quantile, sample_averages
+import numpy as np
+import time
 
-max_profit = 0
-max_upper_bid = 0
-max_lower_bid = 0
+average = 979
 
 def pnl(lower_bid, upper_bid):
     assert(lower_bid <= upper_bid)
-    profit = 0
-    average = 979
-    for reserved_price in range(900, 1000):
-        for number_of_agents in range(reserved_price-900):
-            price = 1000
-            additional = 0
-            if lower_bid > reserved_price:
-                price = lower_bid
-                additional = 1000 - price
-            elif upper_bid > reserved_price:
-                price = upper_bid
-                additional = 1000 - price
-                if upper_bid < average:
-                    additional *= (1000-average)/(1000-upper_bid)
-            profit += additional
-    return profit
+    return bid_pnl_matrix([lower_bid], [upper_bid], average=average)[0, 0]
 
-for l in range(900, 1000):
-    for u in range(l, 1000):
-        profit = pnl(l, u)
-        if profit > max_profit:
-            max_profit = profit
-            max_upper_bid = u
-            max_lower_bid = l
+bids = np.arange(900, 1000)
+max_profit, max_lower_bid, max_upper_bid = best_bids(bids, bids, average=average)
 print(max_profit, max_upper_bid, max_lower_bid)
 print(pnl(952, 978))
 print(pnl(953, 979))
 print(pnl(953, 980))
+
+#the 979 above is a guess, integrate over a spread of crowd averages instead
+start = time.time()
+averages = sample_averages(100_000, np.random.default_rng(0), mean=979, std=5)
+mean, std = expected_bid_pnl(bids, bids, averages)
+worst = bid_pnl_quantile(bids, bids, averages, 0.05)
+i, j = np.unravel_index(np.nanargmax(mean), mean.shape)
+print("robust best: lower {} upper {} expected {:.0f} std {:.0f} 5% quantile {:.0f} ({:.3f}s)".format(bids[i], bids[j], mean[i, j], std[i, j], worst[i, j], time.time() - start))
+for l, u in ((952, 978), (953, 979), (953, 980)):
+    print(l, u, "expected {:.0f} std {:.0f} 5% quantile {:.0f}".format(mean[l-900, u-900], std[l-900, u-900], worst[l-900, u-900]))
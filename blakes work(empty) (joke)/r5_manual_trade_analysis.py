@@ -1,10 +1,27 @@
 #pnl = 750000 * %/100 * expected gain ratio - fees. fees = 90%^2
 #maximum when derivative of pnl wrt % = 0
 #% = 750000/18000 * expected gain ratio
+from news_allocation import allocate
+import numpy as np
 def pnl(expected_ratio):
     return 75e4/180e2 * expected_ratio
 def inv(pnl):
     return 180e2 * pnl/75e4
+
+#all products at once with the 100% cap: expected return per product as a number, a (mean, std) tuple or a list of outcomes
+#fill these in from the news, negative = we think it drops
+news = {
+    "product 1": (0.10, 0.05),
+    "product 2": (-0.05, 0.10),
+    "product 3": [0.0, 0.02, 0.4],
+    "product 4": 0.01,
+}
+allocation, samples = allocate(news)
+for product, x in allocation.items():
+    print("{: <12} {: >4}%".format(product, x))
+print("total {}%, expected pnl {:.0f}, std {:.0f}, 5% quantile {:.0f}".format(
+    sum(abs(x) for x in allocation.values()), samples.mean(), samples.std(), np.quantile(samples, 0.05)))
+
 import matplotlib.pyplot as plt
 plt.plot([i for i in range(101)], [pnl(i/100) for i in range(101)])
 plt.xlabel("Expected Gain Ratio (%)")
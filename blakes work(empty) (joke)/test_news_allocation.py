@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from news_allocation import sample_returns
+
+
+def test_two_outcome_list_is_outcomes_not_mean_std():
+    samples = sample_returns({"p": [-0.1, 0.3]}, 10_000, np.random.default_rng(0))[:, 0]
+    assert set(np.unique(samples)) == {-0.1, 0.3}
+    assert abs(samples.mean() - 0.1) < 0.01
+
+
+def test_tuple_is_mean_std():
+    samples = sample_returns({"p": (0.05, 0.02)}, 100_000, np.random.default_rng(0))[:, 0]
+    assert len(np.unique(samples)) > 2
+    assert abs(samples.mean() - 0.05) < 1e-3
+    assert abs(samples.std() - 0.02) < 1e-3
+
+
+def test_fixed_number_and_bad_tuple():
+    rng = np.random.default_rng(0)
+    assert np.all(sample_returns({"p": 0.01}, 5, rng) == 0.01)
+    with pytest.raises(ValueError):
+        sample_returns({"p": (0.1, 0.2, 0.3)}, 5, rng)
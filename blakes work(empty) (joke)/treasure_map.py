@@ -0,0 +1,85 @@
+import numpy as np
+
+#r3 map: treasure multiplier and resident hunters per tile
+MULTS = np.array([24, 70, 41, 21, 60, 47, 82, 87, 80, 35, 73, 89, 100, 90, 17, 77, 83, 85, 79, 55, 12, 27, 52, 15, 30])
+HUNTERS = np.array([2, 4, 3, 2, 4, 3, 5, 5, 5, 3, 4, 5, 8, 7, 2, 5, 5, 5, 5, 4, 2, 3, 4, 2, 3])
+BASE_TREASURE = 7500
+#first expedition is free, the second costs 25k, the third 75k
+EXPEDITION_COSTS = [0, 25000, 75000]
+
+#every crowd model returns (samples x tiles) percentages of players on each tile, rows sum to total_percent
+#the model's own parameter is drawn per sample so one run covers a range of crowds, not one guess
+
+#players pick tiles with probability ~ exp(beta * mult/hunters), beta ~ U(beta_low, beta_high)
+def logit_crowd(n, rng, mults=MULTS, hunters=HUNTERS, beta_low=0.0, beta_high=0.5, total_percent=100):
+    value = mults / hunters
+    beta = rng.uniform(beta_low, beta_high, size=(n, 1))
+    logits = beta * (value - value.max())
+    weights = np.exp(logits)
+    return total_percent * weights / weights.sum(axis=1, keepdims=True)
+
+#the original r3 assumption: players spread evenly over every tile worth at least `threshold`, threshold ~ U(low, high)
+def step_crowd(n, rng, mults=MULTS, hunters=HUNTERS, threshold_low=8, threshold_high=14, total_percent=100):
+    value = mults / hunters
+    threshold = rng.uniform(threshold_low, threshold_high, size=(n, 1))
+    chosen = (value >= np.minimum(threshold, value.max())).astype(float)
+    return total_percent * chosen / chosen.sum(axis=1, keepdims=True)
+
+#players pick proportional to (mult/hunters)^gamma, gamma ~ U(gamma_low, gamma_high)
+def proportional_crowd(n, rng, mults=MULTS, hunters=HUNTERS, gamma_low=0.5, gamma_high=3.0, total_percent=100):
+    value = mults / hunters
+    gamma = rng.uniform(gamma_low, gamma_high, size=(n, 1))
+    weights = (value / value.max()) ** gamma
+    return total_percent * weights / weights.sum(axis=1, keepdims=True)
+
+CROWD_MODELS = {"logit": logit_crowd, "step": step_crowd, "proportional": proportional_crowd}
+
+#adds per-sample noise around a crowd: dirichlet with mean = the crowd, bigger concentration = less noise
+def jitter(crowd, rng, concentration=200, total_percent=100):
+    alpha = np.maximum(crowd / total_percent * concentration, 1e-3)
+    noisy = rng.gamma(alpha)
+    return total_percent * noisy / noisy.sum(axis=1, keepdims=True)
+
+#what one expedition to each tile pays, (samples x tiles)
+def tile_payoffs(crowd, mults=MULTS, hunters=HUNTERS):
+    return BASE_TREASURE * mults / (hunters + crowd)
+
+#runs `n_samples` crowds split evenly over `models`, in chunks so a million samples stays small in memory
+#returns the running sums needed for mean/std of every single tile and every pair of tiles
+def simulate(n_samples=1_000_000, models=("logit", "step", "proportional"), noise=200, seed=0, chunk=100_000, mults=MULTS, hunters=HUNTERS):
+    rng = np.random.default_rng(seed)
+    tiles = len(mults)
+    total = np.zeros(tiles)
+    outer = np.zeros((tiles, tiles))
+    done = 0
+    per_model = n_samples // len(models)
+
+    for name in models:
+        left = per_model
+        while left > 0:
+            n = min(chunk, left)
+            crowd = CROWD_MODELS[name](n, rng, mults, hunters)
+            if noise:
+                crowd = jitter(crowd, rng, noise)
+            pay = tile_payoffs(crowd, mults, hunters)
+            total += pay.sum(axis=0)
+            outer += pay.T @ pay
+            done += n
+            left -= n
+
+    mean = total / done
+    cov = outer / done - np.outer(mean, mean)
+    return mean, cov
+
+#expected pnl and std of every single tile choice and every pair (second expedition paid for)
+def rank_choices(mean, cov, costs=EXPEDITION_COSTS):
+    tiles = len(mean)
+    rows = []
+    for i in range(tiles):
+        rows.append(((i,), mean[i] - costs[0], np.sqrt(max(cov[i, i], 0))))
+    for i in range(tiles):
+        for j in range(i + 1, tiles):
+            var = cov[i, i] + cov[j, j] + 2 * cov[i, j]
+            rows.append(((i, j), mean[i] + mean[j] - costs[0] - costs[1], np.sqrt(max(var, 0))))
+    rows.sort(key=lambda r: -r[1])
+    return rows
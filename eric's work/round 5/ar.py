@@ -0,0 +1,89 @@
+"""
+Offline AR(k) fit of the next worst-level (wall) mid on the last k of them:
+
+    mid[t + 1] = intercept + c_1 * mid[t - k + 1] + ... + c_k * mid[t]
+
+One least squares solve per product on the stacked (sliding window) lag matrices of every day, lags
+never cross from one day into the next. The coefficients get pasted into round5.AR_COEFFS, live it's
+a k term dot product over the ring buffer in PickledData instead of a polyfit every tick.
+
+usage: python ar.py [k]   (no k: picks it per product on the last day held out)
+"""
+import sys
+from typing import Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import datasets
+from array_book import BookFrame
+
+MAX_K = 8
+
+
+def wall_mids(round_num: int, product: str) -> List[np.ndarray]:
+    """ (worst bid + worst ask) / 2 per day, gaps carried forward """
+    out = []
+    for path in datasets.price_files(round_num):
+        frame = BookFrame.from_prices(datasets.load_prices(path), product)
+        mid = (frame.worst_bid + frame.worst_ask) / 2
+        idx = np.maximum.accumulate(np.where(np.isnan(mid), 0, np.arange(len(mid))))
+        out.append(mid[idx])
+    return out
+
+
+def lag_matrix(mids: List[np.ndarray], k: int):
+    """ (X, y): rows of [1, k lags oldest first] and the mid one tick later, stacked over days """
+    xs, ys = [], []
+    for mid in mids:
+        mid = mid[~np.isnan(mid)]
+        if len(mid) <= k:
+            continue
+        windows = sliding_window_view(mid[:-1], k)
+        xs.append(np.column_stack((np.ones(len(windows)), windows)))
+        ys.append(mid[k:])
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def fit(mids: List[np.ndarray], k: int):
+    """ (intercept, coefficients oldest lag first) """
+    x, y = lag_matrix(mids, k)
+    beta = np.linalg.lstsq(x, y, rcond=None)[0]
+    return float(beta[0]), [float(c) for c in beta[1:]]
+
+
+def rmse(mids: List[np.ndarray], intercept: float, coefs: List[float]) -> float:
+    x, y = lag_matrix(mids, len(coefs))
+    return float(np.sqrt(np.mean((x @ np.concatenate(([intercept], coefs)) - y) ** 2)))
+
+
+def choose_k(mids: List[np.ndarray], max_k: int = MAX_K) -> Dict[int, float]:
+    """ held out rmse (fit on every day but the last, test on the last) for k = 1..max_k """
+    return {k: rmse(mids[-1:], *fit(mids[:-1], k)) for k in range(1, max_k + 1)}
+
+
+def fit_all(k: int = None) -> Dict[str, tuple]:
+    """ `{product: (intercept, coefs)}` for every product we have data for """
+    out = {}
+    for round_num in sorted(datasets.ROUND_DIRS):
+        products = datasets.load_prices(datasets.price_files(round_num)[0])["product"].unique()
+        for product in sorted(products):
+            mids = wall_mids(round_num, product)
+            if k is None:
+                scores = choose_k(mids)
+                #smallest k within 0.5% of the best, longer buffers buy nothing
+                best = min(scores.values())
+                product_k = min(kk for kk, score in scores.items() if score <= best * 1.005)
+            else:
+                product_k = k
+            out[product] = fit(mids, product_k)
+    return out
+
+
+if __name__ == "__main__":
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    coeffs = fit_all(k)
+    print("AR_COEFFS = {")
+    for product, (intercept, coefs) in coeffs.items():
+        print("  '{}': ({!r}, [{}]),".format(product, round(intercept, 6), ", ".join(repr(round(c, 6)) for c in coefs)))
+    print("}")
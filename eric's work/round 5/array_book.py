@@ -0,0 +1,218 @@
+"""
+Array backed order books for the backtester/research code.
+
+`ArrayOrderDepth` is a single tick's book holding sorted numpy price/volume arrays per side, but
+`buy_orders`/`sell_orders` still read like the `Dict[int, int]` in datamodel.OrderDepth
+(items/keys/values/get/[]/in/len/iter), so the strategies run on it unchanged.
+Bids are kept highest first and asks lowest first, i.e. already in the order every strategy sorts them
+into, and sell volumes are negative like on the exchange.
+
+`BookFrame` is a whole day of one product as (ticks x 3 levels) arrays, built straight from the
+bid_price_1..ask_volume_3 columns of a prices csv. Book sweeps (`for ask, vol in osell.items()`)
+turn into masked cumsums over all ticks at once.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+LEVELS = 3
+
+
+class SideView:
+    """ read-only dict-like view of one side of the book """
+
+    __slots__ = ("prices", "volumes")
+
+    def __init__(self, prices, volumes) -> None:
+        self.prices = prices
+        self.volumes = volumes
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __iter__(self):
+        return iter(self.prices.tolist())
+
+    def __contains__(self, price) -> bool:
+        return bool(np.any(self.prices == price))
+
+    def __getitem__(self, price) -> int:
+        idx = np.flatnonzero(self.prices == price)
+        if len(idx) == 0:
+            raise KeyError(price)
+        return int(self.volumes[idx[0]])
+
+    def get(self, price, default=None):
+        idx = np.flatnonzero(self.prices == price)
+        return int(self.volumes[idx[0]]) if len(idx) else default
+
+    def keys(self):
+        return self.prices.tolist()
+
+    def values(self):
+        return self.volumes.tolist()
+
+    def items(self):
+        return list(zip(self.prices.tolist(), self.volumes.tolist()))
+
+    def to_dict(self) -> Dict[int, int]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+
+class ArrayOrderDepth:
+    """
+    Same read API as datamodel.OrderDepth.
+
+    Parameters:
+    - `bid_prices`, `bid_volumes` - sorted highest price first, volumes positive
+    - `ask_prices`, `ask_volumes` - sorted lowest price first, volumes negative
+    """
+
+    __slots__ = ("bid_prices", "bid_volumes", "ask_prices", "ask_volumes", "buy_orders", "sell_orders")
+
+    def __init__(self, bid_prices, bid_volumes, ask_prices, ask_volumes) -> None:
+        self.bid_prices = bid_prices
+        self.bid_volumes = bid_volumes
+        self.ask_prices = ask_prices
+        self.ask_volumes = ask_volumes
+        self.buy_orders = SideView(bid_prices, bid_volumes)
+        self.sell_orders = SideView(ask_prices, ask_volumes)
+
+    @classmethod
+    def from_order_depth(cls, order_depth) -> "ArrayOrderDepth":
+        bids = sorted(order_depth.buy_orders.items(), reverse=True)
+        asks = sorted(order_depth.sell_orders.items())
+        return cls(np.array([p for p, _ in bids], dtype=np.int64), np.array([v for _, v in bids], dtype=np.int64),
+                   np.array([p for p, _ in asks], dtype=np.int64), np.array([v for _, v in asks], dtype=np.int64))
+
+    @property
+    def __dict__(self) -> dict:
+        #so ProsperityEncoder / Logger.compress_order_depths still serialise it like an OrderDepth
+        return {"buy_orders": self.buy_orders.to_dict(), "sell_orders": self.sell_orders.to_dict()}
+
+    def sweep_asks(self, limit_price, max_quantity: int):
+        """
+        Buys everything offered at or below `limit_price`, up to `max_quantity`
+
+        Returns:
+        - (prices, quantities) of the levels taken, quantities positive
+        """
+        mask = self.ask_prices <= limit_price
+        filled = np.minimum(np.cumsum(-self.ask_volumes[mask]), max(max_quantity, 0))
+        qty = np.diff(filled, prepend=0)
+        keep = qty > 0
+        return self.ask_prices[mask][keep], qty[keep]
+
+    def sweep_bids(self, limit_price, max_quantity: int):
+        """
+        Sells into every bid at or above `limit_price`, up to `max_quantity`
+
+        Returns:
+        - (prices, quantities) of the levels hit, quantities positive
+        """
+        mask = self.bid_prices >= limit_price
+        filled = np.minimum(np.cumsum(self.bid_volumes[mask]), max(max_quantity, 0))
+        qty = np.diff(filled, prepend=0)
+        keep = qty > 0
+        return self.bid_prices[mask][keep], qty[keep]
+
+
+class BookFrame:
+    """
+    One product over a whole day, every array is (ticks, LEVELS) with NaN for missing levels.
+    Level 0 is the best price on each side. Ask volumes are stored positive here.
+    """
+
+    def __init__(self, product: str, timestamp, bid_price, bid_volume, ask_price, ask_volume) -> None:
+        self.product = product
+        self.timestamp = timestamp
+        self.bid_price = bid_price
+        self.bid_volume = bid_volume
+        self.ask_price = ask_price
+        self.ask_volume = ask_volume
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, product: str) -> "BookFrame":
+        """
+        Parameters:
+        - `prices` - a prices_round_X_day_Y.csv loaded with `datasets.load_prices`
+        - `product` - which product to pull out
+        """
+        rows = prices[prices["product"] == product]
+
+        def levels(name):
+            return rows[[name + "_" + str(i) for i in range(1, LEVELS + 1)]].to_numpy(dtype=float)
+
+        return cls(product, rows["timestamp"].to_numpy(dtype=np.int64),
+                   levels("bid_price"), levels("bid_volume"), levels("ask_price"), levels("ask_volume"))
+
+    @classmethod
+    def all_products(cls, prices: pd.DataFrame) -> Dict[str, "BookFrame"]:
+        return {product: cls.from_prices(prices, product) for product in prices["product"].unique()}
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def best_bid(self):
+        return self.bid_price[:, 0]
+
+    @property
+    def best_ask(self):
+        return self.ask_price[:, 0]
+
+    @property
+    def mid_price(self):
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def worst_bid(self):
+        """ deepest bid level, what `next(reversed(obuy))` gives in the strategies (NaN if the side is empty) """
+        #fmin skips NaNs like nanmin but doesn't warn on empty sides
+        return np.fmin.reduce(self.bid_price, axis=1)
+
+    @property
+    def worst_ask(self):
+        return np.fmax.reduce(self.ask_price, axis=1)
+
+    @property
+    def total_bid_volume(self):
+        return np.nansum(self.bid_volume, axis=1)
+
+    @property
+    def total_ask_volume(self):
+        return np.nansum(self.ask_volume, axis=1)
+
+    def depth_at(self, i: int) -> ArrayOrderDepth:
+        """ the book at tick `i` as something the strategies can read """
+        bid_ok = ~np.isnan(self.bid_price[i])
+        ask_ok = ~np.isnan(self.ask_price[i])
+        return ArrayOrderDepth(self.bid_price[i][bid_ok].astype(np.int64), self.bid_volume[i][bid_ok].astype(np.int64),
+                               self.ask_price[i][ask_ok].astype(np.int64), -self.ask_volume[i][ask_ok].astype(np.int64))
+
+    def sweep_asks(self, limit_price, max_quantity):
+        """
+        Bulk version of `for ask, vol in osell.items(): if ask <= limit ...` for every tick at once
+
+        Parameters:
+        - `limit_price` - scalar or (ticks,) array, highest price we're willing to pay
+        - `max_quantity` - scalar or (ticks,) array, most we're allowed to buy
+
+        Returns:
+        - `filled` - (ticks, LEVELS) quantity bought at each level
+        """
+        return _sweep(self.ask_price <= np.reshape(limit_price, (-1, 1)), self.ask_volume, max_quantity)
+
+    def sweep_bids(self, limit_price, max_quantity):
+        """ same as `sweep_asks` but selling into bids at or above `limit_price` """
+        return _sweep(self.bid_price >= np.reshape(limit_price, (-1, 1)), self.bid_volume, max_quantity)
+
+
+def _sweep(mask, volume, max_quantity):
+    available = np.where(mask, np.nan_to_num(volume), 0)
+    filled = np.minimum(np.cumsum(available, axis=1), np.reshape(np.maximum(max_quantity, 0), (-1, 1)))
+    return np.diff(filled, axis=1, prepend=0)
@@ -0,0 +1,291 @@
+"""
+Replays a prices/trades csv day through a Trader, tick by tick.
+
+Matching is the same idea as prosperity2bt: our orders first take liquidity from the book at the book's
+prices, whatever is left can then get filled at our price by market trades of that tick that traded
+through it. If the orders for a product would breach the position limit (assuming they all fill),
+the whole product is rejected for that tick like on the exchange. Conversions are ignored since we
+don't have the ORCHIDS observations for the round 5 data.
+
+Batch mode: if the trader has `vectorized_signals(books)`, those are computed once for the whole day
+and each tick's row is handed to `run(state, signals=...)`.
+"""
+import contextlib
+import io
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import datasets
+from array_book import BookFrame
+from datamodel_slots import Listing, Observation, OrderDepth, Trade, TradingState
+from round5 import POSITION_LIMITS
+
+#same table the submission clips its orders to
+LIMITS = POSITION_LIMITS
+
+
+class BacktestResult:
+    """
+    Per product, one entry per tick:
+    - `pnl` (mark to market at mid, the last one when a side of the book is empty), `position`
+
+    Per own fill (`fills`, one row each):
+    - tick index, timestamp, product, price, signed quantity, aggressive (took the book) or passive
+    """
+
+    def __init__(self, timestamp, products: List[str]) -> None:
+        n = len(timestamp)
+        self.timestamp = timestamp
+        self.pnl = {p: np.zeros(n) for p in products}
+        self.position = {p: np.zeros(n, dtype=np.int64) for p in products}
+        self.fills: List[tuple] = []
+        self.rejected = {p: 0 for p in products}
+        self.mid = {p: np.zeros(n) for p in products}
+        self.elapsed = 0.0
+
+    @property
+    def total_pnl(self):
+        return sum(self.pnl.values())
+
+    def fill_arrays(self, product: str):
+        """ (timestamp, price, quantity, aggressive) arrays of our fills in one product """
+        rows = [f for f in self.fills if f[2] == product]
+        return (np.array([f[1] for f in rows], dtype=np.int64), np.array([f[3] for f in rows], dtype=float),
+                np.array([f[4] for f in rows], dtype=np.int64), np.array([f[5] for f in rows], dtype=bool))
+
+    def summary(self) -> Dict[str, float]:
+        return {p: float(pnl[-1]) for p, pnl in self.pnl.items()}
+
+    def stats(self) -> Dict[str, dict]:
+        """ per product: final pnl, variance and max of the position over the day """
+        return {p: {"pnl": float(self.pnl[p][-1]), "inventory_variance": float(np.var(self.position[p])),
+                    "max_abs_position": int(np.abs(self.position[p]).max())} for p in self.pnl}
+
+    def execution_stats(self, product: str) -> Dict[str, float]:
+        """
+        How often we traded a product and what crossing the book cost: `trade_ticks` (ticks with a fill),
+        `volume`, `crossing_cost` (sum over aggressive fills of |price - mid| * quantity) and `pnl_std`
+        (std of the per-tick pnl changes)
+        """
+        ticks = np.array([f[0] for f in self.fills if f[2] == product], dtype=np.int64)
+        _, price, qty, aggressive = self.fill_arrays(product)
+        cost = np.abs(price - self.mid[product][ticks]) * np.abs(qty)
+        return {"trade_ticks": len(np.unique(ticks)), "volume": int(np.abs(qty).sum()),
+                "crossing_cost": float(cost[aggressive].sum()), "pnl_std": float(np.nanstd(np.diff(self.pnl[product])))}
+
+
+def _carry_forward(values: np.ndarray) -> np.ndarray:
+    """ NaNs replaced by the last value before them (leading NaNs stay) """
+    idx = np.maximum.accumulate(np.where(np.isnan(values), 0, np.arange(len(values))))
+    return values[idx]
+
+
+def load_day(round_num: int, day_index: int):
+    """ (prices, trades) dataframes for the `day_index`-th day we have of a round """
+    return datasets.load_prices(datasets.price_files(round_num)[day_index]), datasets.load_trades(datasets.trade_files(round_num)[day_index])
+
+
+def _market_trades_by_tick(trades) -> Dict[int, Dict[str, list]]:
+    by_tick: Dict[int, Dict[str, list]] = {}
+    if trades is None:
+        return by_tick
+    for timestamp, symbol, price, quantity, buyer, seller in trades[["timestamp", "symbol", "price", "quantity", "buyer", "seller"]].itertuples(index=False):
+        by_tick.setdefault(int(timestamp), {}).setdefault(symbol, []).append(
+            Trade(symbol, int(price), int(quantity), str(buyer) if buyer == buyer else "", str(seller) if seller == seller else "", int(timestamp)))
+    return by_tick
+
+
+def _order_depth(frame: BookFrame, i: int) -> OrderDepth:
+    depth = OrderDepth()
+    for price, vol in zip(frame.bid_price[i], frame.bid_volume[i]):
+        if price == price:
+            depth.buy_orders[int(price)] = int(vol)
+    for price, vol in zip(frame.ask_price[i], frame.ask_volume[i]):
+        if price == price:
+            depth.sell_orders[int(price)] = -int(vol)
+    return depth
+
+
+def _match(product, orders, depth: OrderDepth, market_trades, position: int):
+    """
+    Returns:
+    - list of (price, signed quantity, aggressive) fills, or None if the orders breach the limit
+    """
+    limit = LIMITS.get(product, 0)
+    buys = sum(o.quantity for o in orders if o.quantity > 0)
+    sells = -sum(o.quantity for o in orders if o.quantity < 0)
+    if position + buys > limit or position - sells < -limit:
+        return None
+
+    asks = dict(depth.sell_orders)
+    bids = dict(depth.buy_orders)
+    remaining_trades = [[t.price, t.quantity] for t in market_trades]
+    fills = []
+
+    for order in orders:
+        left = abs(order.quantity)
+        if order.quantity > 0:
+            for price in sorted(asks):
+                if price > order.price or left == 0:
+                    break
+                qty = min(left, -asks[price])
+                if qty == 0:
+                    continue
+                asks[price] += qty
+                left -= qty
+                fills.append((price, qty, True))
+            for trade in remaining_trades:
+                if left == 0:
+                    break
+                if trade[0] <= order.price and trade[1] > 0:
+                    qty = min(left, trade[1])
+                    trade[1] -= qty
+                    left -= qty
+                    fills.append((order.price, qty, False))
+        elif order.quantity < 0:
+            for price in sorted(bids, reverse=True):
+                if price < order.price or left == 0:
+                    break
+                qty = min(left, bids[price])
+                if qty == 0:
+                    continue
+                bids[price] -= qty
+                left -= qty
+                fills.append((price, -qty, True))
+            for trade in remaining_trades:
+                if left == 0:
+                    break
+                if trade[0] >= order.price and trade[1] > 0:
+                    qty = min(left, trade[1])
+                    trade[1] -= qty
+                    left -= qty
+                    fills.append((order.price, -qty, False))
+
+    return fills
+
+
+def run_backtest(trader, prices, trades=None, batch: bool = True, max_ticks: int = None) -> BacktestResult:
+    """
+    Parameters:
+    - `trader` - a fresh Trader instance
+    - `prices`, `trades` - one day from `load_day` (trades optional, no passive fills without them)
+    - `batch` - use `trader.vectorized_signals` when the trader has it
+    - `max_ticks` - only replay the first `max_ticks` ticks of the day
+
+    Returns:
+    - `BacktestResult`
+    """
+    start = time.perf_counter()
+    books = BookFrame.all_products(prices)
+    products = sorted(books)
+    timestamp = books[products[0]].timestamp
+    if max_ticks is not None:
+        timestamp = timestamp[:max_ticks]
+    n = len(timestamp)
+
+    signals = None
+    if batch and hasattr(trader, "vectorized_signals"):
+        signals = trader.vectorized_signals(books)
+
+    market = _market_trades_by_tick(trades)
+    listings = {p: Listing(p, p, "SEASHELLS") for p in products}
+    observations = Observation({}, {})
+    result = BacktestResult(timestamp, products)
+
+    position = {p: 0 for p in products}
+    cash = {p: 0.0 for p in products}
+    own_trades: Dict[str, list] = {}
+    trader_data = ""
+    mids = {p: books[p].mid_price for p in products}
+    #ticks with an empty side have no mid, mark those at the last one we had
+    marks = {p: _carry_forward(m) for p, m in mids.items()}
+
+    #the Logger prints a json blob every tick, nobody needs that here
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        for i in range(n):
+            ts = int(timestamp[i])
+            depths = {p: _order_depth(books[p], i) for p in products}
+            state = TradingState(trader_data, ts, listings, depths, own_trades, market.get(ts - 100, {}),
+                                 {p: q for p, q in position.items() if q != 0}, observations)
+
+            if signals is not None:
+                orders, _, trader_data = trader.run(state, signals={p: int(s[i]) for p, s in signals.items()})
+            else:
+                orders, _, trader_data = trader.run(state)
+
+            own_trades = {}
+            for product, product_orders in orders.items():
+                if product not in depths or not product_orders:
+                    continue
+                fills = _match(product, product_orders, depths[product], market.get(ts, {}).get(product, []), position[product])
+                if fills is None:
+                    result.rejected[product] += 1
+                    continue
+                for price, qty, aggressive in fills:
+                    position[product] += qty
+                    cash[product] -= price * qty
+                    result.fills.append((i, ts, product, price, qty, aggressive))
+                    own_trades.setdefault(product, []).append(
+                        Trade(product, price, abs(qty), "SUBMISSION" if qty > 0 else "", "" if qty > 0 else "SUBMISSION", ts))
+
+            for p in products:
+                result.mid[p][i] = mids[p][i]
+                result.position[p][i] = position[p]
+                result.pnl[p][i] = cash[p] + (position[p] * marks[p][i] if position[p] else 0.0)
+
+            sink.seek(0)
+            sink.truncate()
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def simulate_signal(frame: BookFrame, signal, limit: int) -> np.ndarray:
+    """
+    Fast path for threshold sweeps: replays the "go all in at the worst level" sizing of trade_basket /
+    trade_coconut against one product's book given a whole-day -1/0/1 signal. Only the position
+    dependent part is a python loop, fills are capped by the volume on the side we cross.
+
+    Returns:
+    - mark to market pnl per tick
+    """
+    n = len(frame)
+    ask_vol = frame.total_ask_volume.astype(np.int64)
+    bid_vol = frame.total_bid_volume.astype(np.int64)
+    qty = np.zeros(n, dtype=np.int64)
+
+    position = 0
+    for i in np.flatnonzero(signal):
+        if signal[i] > 0 and position < limit:
+            qty[i] = min(limit - position, ask_vol[i])
+        elif signal[i] < 0 and position > -limit:
+            qty[i] = -min(limit + position, bid_vol[i])
+        position += qty[i]
+
+    #crossing at the worst level sweeps every level, but we pay level by level
+    bought = frame.sweep_asks(frame.worst_ask, qty.clip(0))
+    sold = frame.sweep_bids(frame.worst_bid, (-qty).clip(0))
+    cost = (bought * np.nan_to_num(frame.ask_price)).sum(axis=1) - (sold * np.nan_to_num(frame.bid_price)).sum(axis=1)
+
+    return np.cumsum(-cost) + np.cumsum(qty) * frame.mid_price[:n]
+
+
+def sweep_thresholds(trader_cls, prices, attr: str, product: str, values) -> Dict[float, float]:
+    """
+    End of day pnl of `product` for every value of the threshold attribute `attr` (e.g. "basket_trade_at")
+
+    Parameters:
+    - `trader_cls` - Trader class with `vectorized_signals`
+    - `prices` - one day of prices
+    - `values` - thresholds to try
+    """
+    books = BookFrame.all_products(prices)
+    out = {}
+    for value in values:
+        trader = trader_cls()
+        setattr(trader, attr, value)
+        signal = trader.vectorized_signals(books)[product]
+        out[value] = float(simulate_signal(books[product], signal, LIMITS[product])[-1])
+    return out
@@ -0,0 +1,301 @@
+import collections
+import gc
+import json
+import sys
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import datamodel
+import datamodel_slots
+import backtester
+import datasets
+import orchids
+import round5
+from array_book import BookFrame
+
+
+def _tick_rows(prices, trades=None):
+    """ pre-extracts one day into plain python lists so pandas doesn't show up in the timings """
+    levels = []
+    for i in range(1, 4):
+        levels.append((prices["bid_price_" + str(i)].to_numpy(), prices["bid_volume_" + str(i)].to_numpy(),
+                       prices["ask_price_" + str(i)].to_numpy(), prices["ask_volume_" + str(i)].to_numpy()))
+
+    ticks = {}
+    for row, (timestamp, product) in enumerate(zip(prices["timestamp"].to_numpy(), prices["product"].to_numpy())):
+        book = ([], [])
+        for bid_p, bid_v, ask_p, ask_v in levels:
+            if not np.isnan(bid_p[row]):
+                book[0].append((int(bid_p[row]), int(bid_v[row])))
+            if not np.isnan(ask_p[row]):
+                book[1].append((int(ask_p[row]), -int(ask_v[row])))
+        ticks.setdefault(int(timestamp), {})[product] = book
+
+    market = {}
+    if trades is None:
+        return ticks, market
+    for timestamp, symbol, price, quantity, buyer, seller in trades[["timestamp", "symbol", "price", "quantity", "buyer", "seller"]].itertuples(index=False):
+        market.setdefault(int(timestamp), {}).setdefault(symbol, []).append((symbol, int(price), int(quantity), str(buyer), str(seller), int(timestamp)))
+
+    return ticks, market
+
+
+def _replay(module, ticks, market):
+    """ builds every object the backtester would build for one day (state in, orders out) """
+    states = []
+    position = {}
+    for timestamp, books in ticks.items():
+        listings = {}
+        depths = {}
+        orders = {}
+        for product, (bids, asks) in books.items():
+            listings[product] = module.Listing(product, product, "SEASHELLS")
+            depth = module.OrderDepth()
+            for price, vol in bids:
+                depth.buy_orders[price] = vol
+            for price, vol in asks:
+                depth.sell_orders[price] = vol
+            depths[product] = depth
+            orders[product] = [module.Order(product, bids[0][0] + 1, 1), module.Order(product, asks[0][0] - 1, -1)] if bids and asks else []
+        trades = {symbol: [module.Trade(*t) for t in ts] for symbol, ts in market.get(timestamp - 100, {}).items()}
+        observation = module.Observation({}, {"ORCHIDS": module.ConversionObservation(1100.0, 1101.5, 1.0, 9.5, -5.0, 2500.0, 70.0)})
+        states.append((module.TradingState("", timestamp, listings, depths, {}, trades, dict(position), observation), orders))
+    return states
+
+
+def bench_datamodel(round_num: int = 3, day_index: int = 0, repeats: int = 5) -> None:
+    prices = datasets.load_prices(datasets.price_files(round_num)[day_index])
+    trades = datasets.load_trades(datasets.trade_files(round_num)[day_index])
+    ticks, market = _tick_rows(prices, trades)
+
+    modules = (("dict", datamodel), ("slots", datamodel_slots))
+
+    #interleave the runs so both sides see the same machine noise
+    best = {name: float("inf") for name, _ in modules}
+    gc.disable()
+    for _ in range(repeats):
+        for name, module in modules:
+            start = time.perf_counter()
+            _replay(module, ticks, market)
+            best[name] = min(best[name], time.perf_counter() - start)
+    gc.enable()
+
+    for name, module in modules:
+        tracemalloc.start()
+        states = _replay(module, ticks, market)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del states
+
+        print("{: <6} {: >8.1f} ms/day {: >8.2f} us/tick {: >8.2f} MB held {: >8.0f} B/tick".format(
+            name, best[name]*1e3, best[name]*1e6/len(ticks), current/1e6, current/len(ticks)))
+
+    samples = {"Order": ("AMETHYSTS", 9998, 20), "Trade": ("AMETHYSTS", 9998, 2, "Vinnie", "Remy", 100), "Listing": ("AMETHYSTS", "AMETHYSTS", "SEASHELLS")}
+    for cls, args in samples.items():
+        line = "{: <8}".format(cls)
+        for name, module in modules:
+            ctor = getattr(module, cls)
+            ns = min(timeit.repeat(lambda: ctor(*args), number=100000, repeat=5)) * 1e4
+            obj = ctor(*args)
+            size = sys.getsizeof(obj) + (sys.getsizeof(vars(obj)) if module is datamodel else 0)
+            line += " {: >6} {: >6.0f} ns {: >4} B".format(name, ns, size)
+        print(line)
+
+    #the compat layer has to serialise exactly like the original
+    plain = _replay(datamodel, ticks, market)[:200]
+    slotted = _replay(datamodel_slots, ticks, market)[:200]
+    for (a, _), (b, _) in zip(plain, slotted):
+        assert json.dumps(a, cls=datamodel.ProsperityEncoder, sort_keys=True) == json.dumps(b, cls=datamodel_slots.ProsperityEncoder, sort_keys=True)
+        assert a.toJSON() == b.toJSON()
+    print("ProsperityEncoder output identical on", len(plain), "ticks")
+
+
+def bench_book_sweep(round_num: int = 1, day_index: int = 0, product: str = "STARFRUIT") -> None:
+    prices = datasets.load_prices(datasets.price_files(round_num)[day_index])
+    frame = BookFrame.from_prices(prices, product)
+    limits = np.round(frame.mid_price)
+    ticks, _ = _tick_rows(prices[prices["product"] == product])
+
+    #what the strategies do today: sort the dict then walk it every tick
+    start = time.perf_counter()
+    loop_filled = []
+    for (timestamp, books), limit in zip(ticks.items(), limits):
+        osell = collections.OrderedDict(sorted(dict(books[product][1]).items()))
+        cpos, bought = 0, 0
+        for ask, vol in osell.items():
+            if ask <= limit and cpos < 20:
+                order_for = min(-vol, 20 - cpos)
+                cpos += order_for
+                bought += order_for
+        loop_filled.append(bought)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk_filled = frame.sweep_asks(limits, 20).sum(axis=1)
+    bulk_time = time.perf_counter() - start
+
+    assert np.array_equal(np.array(loop_filled), bulk_filled)
+    print("dict loop {: >8.2f} ms   bulk sweep {: >8.3f} ms   ({:.0f}x) over {} ticks".format(loop_time*1e3, bulk_time*1e3, loop_time/bulk_time, len(frame)))
+
+
+def bench_threshold_sweep(round_num: int = 3, day_index: int = 0, values=(0.4, 0.6, 0.8, 1.0, 1.2)) -> None:
+    prices, trades = backtester.load_day(round_num, day_index)
+
+    start = time.perf_counter()
+    full = {}
+    for value in values:
+        trader = round5.Trader()
+        trader.basket_trade_at = value
+        full[value] = backtester.run_backtest(trader, prices, trades).pnl["GIFT_BASKET"][-1]
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = backtester.sweep_thresholds(round5.Trader, prices, "basket_trade_at", "GIFT_BASKET", values)
+    fast_time = time.perf_counter() - start
+
+    for value in values:
+        print("basket_trade_at {: >4}   full backtest {: >10.0f}   vectorized {: >10.0f}".format(value, full[value], fast[value]))
+    print("full {: >8.2f} s   vectorized {: >8.3f} s   ({:.0f}x)".format(full_time, fast_time, full_time/fast_time))
+
+
+class _PolyfitStarfruit(round5.Trader):
+    """ calc_regression from tester.py: straight line through the last 20 wall mids, one tick ahead """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.mids = []
+
+    def starfruit_fair_value(self, mid_price, order_depth, pickled_data):
+        self.mids = (self.mids + [mid_price])[-20:]
+        if len(self.mids) <= 1:
+            return mid_price
+        x = np.arange(len(self.mids))
+        return float(np.polyval(np.polyfit(x, self.mids, deg=1), len(self.mids)))
+
+
+class _VwapStarfruit(round5.Trader):
+    """ order_gen_STARFRUIT_MT from tester.py: volume weighted price of the whole book """
+
+    def starfruit_fair_value(self, mid_price, order_depth, pickled_data):
+        notional = volume = 0
+        for price, vol in order_depth.buy_orders.items():
+            notional += price*vol
+            volume += vol
+        for price, vol in order_depth.sell_orders.items():
+            notional -= price*vol
+            volume -= vol
+        return notional/volume
+
+
+def bench_starfruit_fair(round_num: int = 1, repeats: int = 3) -> None:
+    def kalman():
+        trader = round5.Trader()
+        trader.starfruit_fair = "kalman"
+        return trader
+
+    def ar():
+        trader = round5.Trader()
+        trader.starfruit_fair = "ar"
+        return trader
+
+    variants = {"moving_average": round5.Trader, "kalman": kalman, "ar": ar, "polyfit": _PolyfitStarfruit, "vwap": _VwapStarfruit}
+
+    prices = datasets.load_prices(datasets.price_files(round_num)[0])
+    frame = BookFrame.from_prices(prices, "STARFRUIT")
+    depths = [backtester._order_depth(frame, i) for i in range(len(frame))]
+    mids = ((frame.worst_bid + frame.worst_ask)/2).tolist()
+
+    days = [backtester.load_day(round_num, d) for d in range(len(datasets.days(round_num)))]
+    for name, make in variants.items():
+        best = float("inf")
+        for _ in range(repeats):
+            trader, pickled = make(), round5.PickledData()
+            start = time.perf_counter()
+            for mid, depth in zip(mids, depths):
+                trader.starfruit_fair_value(mid, depth, pickled)
+            best = min(best, time.perf_counter() - start)
+
+        pnl = []
+        for day_prices, day_trades in days:
+            pnl.append(backtester.run_backtest(make(), day_prices, day_trades).pnl["STARFRUIT"][-1])
+        print("{: <15} {: >8.2f} us/tick   pnl per day {}   total {: >9.0f}".format(
+            name, best*1e6/len(mids), " ".join("{: >8.0f}".format(p) for p in pnl), sum(pnl)))
+
+
+def bench_hedge(round_num: int = 4, risk_aversions=(1e-6, 1e-5, 1e-4, 1e-2)) -> None:
+    """ coupon + COCONUT pnl, its per-tick std and what the COCONUT rebalancing cost, unhedged vs hedged """
+    print("{: <4} {: <10} {: >10} {: >9} {: >10} {: >8} {: >10}".format("day", "hedge", "pnl", "pnl std", "rebalances", "volume", "crossing"))
+    for day_index, day in enumerate(datasets.days(round_num)):
+        prices, trades = backtester.load_day(round_num, day_index)
+        for risk_aversion in (None,) + tuple(risk_aversions):
+            trader = round5.Trader()
+            trader.hedge_coupons = risk_aversion is not None
+            if risk_aversion is not None:
+                trader.hedge_risk_aversion = risk_aversion
+            result = backtester.run_backtest(trader, prices, trades)
+            pnl = result.pnl["COCONUT"] + result.pnl["COCONUT_COUPON"]
+            stats = result.execution_stats("COCONUT")
+            print("{: <4} {: <10} {: >10.0f} {: >9.1f} {: >10} {: >8} {: >10.0f}".format(
+                day, "off" if risk_aversion is None else "{:g}".format(risk_aversion), pnl[-1], np.nanstd(np.diff(pnl)),
+                stats["trade_ticks"], stats["volume"], stats["crossing_cost"]))
+
+
+#per tick cost we're willing to pay for the risk snapshot at the top of run()
+RISK_BUDGET_US = 50
+
+
+def bench_risk(repeats: int = 3) -> None:
+    """ cost of Trader.risk_snapshot per tick, with every product held so the coupon greeks get computed """
+    position = {p: limit // 2 for p, limit in round5.POSITION_LIMITS.items()}
+    trader = round5.Trader()
+    for round_num in [3, 4]:
+        prices = datasets.load_prices(datasets.price_files(round_num)[0])
+        ticks, market = _tick_rows(prices)
+        states = [state for state, _ in _replay(datamodel, ticks, market)]
+        for state in states:
+            state.position = position
+
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for state in states:
+                trader.risk_snapshot(state)
+            best = min(best, time.perf_counter() - start)
+        per_tick = best*1e6/len(states)
+        risk = trader.risk_snapshot(states[-1])
+        print("round {}  {: >6.1f} us/tick ({} the {} us budget)   basket exposure {: >10.0f}   coconut delta {: >7.1f} gamma {: >6.3f}".format(
+            round_num, per_tick, "within" if per_tick <= RISK_BUDGET_US else "OVER", RISK_BUDGET_US,
+            risk.basket_exposure, risk.coconut_delta, risk.coconut_gamma))
+
+
+def bench_orchids(repeats: int = 3) -> None:
+    """ greedy conversions vs the one step plan_orchids on the round 2 sandbox log, pnl and planner cost per tick """
+    ticks = orchids.load_log()
+    print("{: <9} {: >9} {: >8} {: >10} {: >9}".format("planner", "pnl", "volume", "converted", "us/tick"))
+    for planner in ["greedy", "one_step"]:
+        trader = round5.Trader()
+        trader.orchid_planner = planner
+        rows = [orchids.simulate(trader, ticks) for _ in range(repeats)]
+        row = min(rows, key=lambda r: r["us_per_tick"])
+        print("{: <9} {: >9.0f} {: >8} {: >10} {: >9.1f}".format(
+            planner, row["pnl"], row["volume"], row["converted"], row["us_per_tick"]))
+
+
+BENCHMARKS = {
+    "datamodel": bench_datamodel,
+    "book_sweep": bench_book_sweep,
+    "threshold_sweep": bench_threshold_sweep,
+    "starfruit_fair": bench_starfruit_fair,
+    "hedge": bench_hedge,
+    "risk": bench_risk,
+    "orchids": bench_orchids,
+}
+
+if __name__ == "__main__":
+    #usage: python benchmarks.py [name ...]   (runs everything if no names given)
+    for name in (sys.argv[1:] or BENCHMARKS):
+        print("==", name)
+        BENCHMARKS[name]()
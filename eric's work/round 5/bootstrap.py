@@ -0,0 +1,130 @@
+"""
+Block bootstrap confidence intervals for per-tick pnl, so "A made 2k more than B" comes with an
+idea of how much of that is one lucky hour.
+
+Everything works on pnl increments (diff of the cumulative pnl arrays from the backtester or
+log_parser). Ticks are autocorrelated (positions are held for a while), so we resample whole blocks
+of `block` consecutive ticks (circular moving block bootstrap) instead of single ticks.
+
+Nothing per tick is ever materialised per resample: with prefix sums every block's sum is
+C[start + block] - C[start], so one resample is `n_blocks` lookups and 10k resamples of a 30k tick
+day is a (10000, n_blocks) array.
+"""
+import sys
+from typing import Dict
+
+import numpy as np
+
+
+def increments(pnl) -> np.ndarray:
+    """ per-tick pnl changes from a cumulative pnl array, first tick counts from 0 """
+    return np.diff(np.asarray(pnl, dtype=float), prepend=0.0)
+
+
+def default_block(n: int) -> int:
+    #n^(1/3) is the usual rate for the moving block bootstrap, never less than one tick
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def _block_sums(x, block: int):
+    """ sum and sum of squares of every circular block of length `block`, one per start index """
+    n = len(x)
+    wrapped = np.concatenate((x, x[:block]))
+    c1 = np.concatenate(([0.0], np.cumsum(wrapped)))
+    c2 = np.concatenate(([0.0], np.cumsum(wrapped ** 2)))
+    return c1[block:block + n] - c1[:n], c2[block:block + n] - c2[:n]
+
+
+def _starts(n: int, block: int, n_resamples: int, rng):
+    n_blocks = -(-n // block)
+    return rng.integers(0, n, size=(n_resamples, n_blocks))
+
+
+def _stats(s1, s2, starts, n_ticks):
+    """ (total, per-tick sharpe) of every resample """
+    total = s1[starts].sum(axis=1)
+    squares = s2[starts].sum(axis=1)
+    mean = total / n_ticks
+    std = np.sqrt(np.maximum(squares / n_ticks - mean ** 2, 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std, 0.0)
+    return total, sharpe
+
+
+def bootstrap(pnl, n_resamples: int = 10_000, block: int = None, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Resamples one cumulative pnl series
+
+    Parameters:
+    - `pnl` - cumulative pnl per tick (e.g. `BacktestResult.total_pnl` or `ProductLog.pnl`)
+    - `n_resamples` - number of bootstrap samples
+    - `block` - block length in ticks, `default_block(n)` if None
+    - `seed` - rng seed
+
+    Returns:
+    - dict with `total` (end of day pnl) and `sharpe` (mean/std of tick pnl) per resample
+    """
+    x = increments(pnl)
+    block = block or default_block(len(x))
+    rng = np.random.default_rng(seed)
+    s1, s2 = _block_sums(x, block)
+    starts = _starts(len(x), block, n_resamples, rng)
+    #the last block is longer than the day when block doesn't divide n, rescale so totals stay comparable
+    scale = len(x) / (starts.shape[1] * block)
+    total, sharpe = _stats(s1, s2, starts, starts.shape[1] * block)
+    return {"total": total * scale, "sharpe": sharpe}
+
+
+def compare(pnl_a, pnl_b, n_resamples: int = 10_000, block: int = None, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Paired bootstrap of strategy A minus strategy B on the same day: both series get the same blocks
+    in every resample, so market moves that hit both cancel out
+
+    Parameters:
+    - `pnl_a`, `pnl_b` - cumulative pnl per tick, same ticks
+
+    Returns:
+    - dict with `total_a`, `total_b` and `diff` (A - B end of day pnl) per resample
+    """
+    a = increments(pnl_a)
+    b = increments(pnl_b)
+    if len(a) != len(b):
+        raise ValueError("pnl series have different lengths: {} vs {}".format(len(a), len(b)))
+    block = block or default_block(len(a))
+    rng = np.random.default_rng(seed)
+    starts = _starts(len(a), block, n_resamples, rng)
+    scale = len(a) / (starts.shape[1] * block)
+    total_a = _block_sums(a, block)[0][starts].sum(axis=1) * scale
+    total_b = _block_sums(b, block)[0][starts].sum(axis=1) * scale
+    return {"total_a": total_a, "total_b": total_b, "diff": total_a - total_b}
+
+
+def interval(samples, level: float = 0.95):
+    """ percentile interval (low, high) covering `level` of the samples """
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def report(pnl_a, pnl_b=None, level: float = 0.95, **kwargs) -> dict:
+    """
+    Point estimate + interval of one strategy, or of A - B plus how often A wins if `pnl_b` is given
+    """
+    if pnl_b is None:
+        samples = bootstrap(pnl_a, **kwargs)
+        return {"pnl": float(np.asarray(pnl_a)[-1]), "pnl_ci": interval(samples["total"], level),
+                "sharpe_ci": interval(samples["sharpe"], level)}
+    samples = compare(pnl_a, pnl_b, **kwargs)
+    return {"diff": float(np.asarray(pnl_a)[-1] - np.asarray(pnl_b)[-1]), "diff_ci": interval(samples["diff"], level),
+            "p_a_better": float(np.mean(samples["diff"] > 0))}
+
+
+if __name__ == "__main__":
+    #usage: python bootstrap.py a.log [b.log]  (total pnl over all products of each log)
+    import log_parser
+
+    totals = []
+    for path in sys.argv[1:3]:
+        logs = log_parser.load_log(path)
+        totals.append(sum(log.pnl for log in logs.values()))
+    print(report(*totals))
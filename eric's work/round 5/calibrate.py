@@ -0,0 +1,167 @@
+"""
+Walk-forward calibration of the constants baked into round5.py.
+
+BASKET_MEAN/BASKET_STD and COUPON_VOL/COUPON_STD were fitted in the notebooks on every day we had,
+then backtested on those same days. Here every fold fits on days 1..k only and backtests on day k+1,
+next to a backtest of the same day with the constants round5.py currently uses, so the gap between the
+two is roughly what the lookahead was worth.
+
+Folds are cached in CACHE_FILE keyed by the files they read (path, size, mtime), so dropping a new
+day into a round folder only computes the one new fold. The fit on all days is printed at the end, ready
+to paste over the constants in round5.py (nothing is read back at import, the exchange only gets round5.py).
+
+usage: python calibrate.py [basket|coupon ...]
+"""
+import json
+import os
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+import backtester
+import datasets
+import round5
+from array_book import BookFrame
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration_cache.json")
+
+#what round5.py is running with, every fold is compared against it
+CURRENT = {name: getattr(round5, name) for name in ["BASKET_MEAN", "BASKET_STD", "COUPON_STD", "COUPON_VOL"]}
+
+
+def _books(path: str) -> Dict[str, BookFrame]:
+    return BookFrame.all_products(datasets.load_prices(path))
+
+
+def fit_basket(paths: List[str]) -> Dict[str, float]:
+    """ mean/std of basket - 4 chocolate - 6 strawberries - roses - 400 over the days in `paths` """
+    raw = []
+    for path in paths:
+        mid = {p: frame.mid_price for p, frame in _books(path).items()}
+        raw.append(mid["GIFT_BASKET"] - 4 * mid["CHOCOLATE"] - 6 * mid["STRAWBERRIES"] - mid["ROSES"] - 400)
+    raw = np.concatenate(raw)
+    #basket_spread adds BASKET_MEAN, so it's minus the mean of the raw spread
+    return {"BASKET_MEAN": float(-np.nanmean(raw)), "BASKET_STD": float(np.nanstd(raw))}
+
+
+def fit_coupon(paths: List[str], low: float = 0.01, high: float = 1.0, iterations: int = 50) -> Dict[str, float]:
+    """
+    COUPON_VOL = the implied vol that makes the mean mispricing zero (bisection, the BS price only goes up with vol),
+    COUPON_STD = std of the mispricing at that vol
+    """
+    coupon, coconut = [], []
+    for path in paths:
+        books = _books(path)
+        coupon.append(books["COCONUT_COUPON"].mid_price)
+        coconut.append(books["COCONUT"].mid_price)
+    coupon, coconut = np.concatenate(coupon), np.concatenate(coconut)
+    trader = round5.Trader()
+
+    def mispricing(vol):
+        round5.set_constants({"COUPON_VOL": vol})
+        return trader.coupon_mispricing(coupon, coconut).astype(float)
+
+    try:
+        for _ in range(iterations):
+            vol = (low + high) / 2
+            if np.nanmean(mispricing(vol)) > 0:
+                low = vol
+            else:
+                high = vol
+        vol = (low + high) / 2
+        return {"COUPON_VOL": vol, "COUPON_STD": float(np.nanstd(mispricing(vol)))}
+    finally:
+        round5.set_constants(CURRENT)
+
+
+#name: (round, fit, product whose pnl the constants drive)
+FITS = {
+    "basket": (3, fit_basket, "GIFT_BASKET"),
+    "coupon": (4, fit_coupon, "COCONUT_COUPON"),
+}
+
+
+def _signature(path: str) -> str:
+    stat = os.stat(path)
+    return "{}:{}:{}".format(os.path.basename(path), stat.st_size, int(stat.st_mtime))
+
+
+def _test_pnl(round_num: int, day_index: int, product: str, constants: Dict[str, float]) -> float:
+    round5.set_constants(constants)
+    try:
+        result = backtester.run_backtest(round5.Trader(), *backtester.load_day(round_num, day_index))
+    finally:
+        round5.set_constants(CURRENT)
+    return float(result.pnl[product][-1])
+
+
+def walk_forward(name: str, cache: dict) -> List[dict]:
+    """
+    Every fold of one fit: train on the first k days, test on day k+1
+
+    Returns:
+    - one dict per fold with the train/test days, the fitted constants, the walk-forward pnl on the
+      test day and the pnl with the current constants
+    """
+    round_num, fit, product = FITS[name]
+    paths = datasets.price_files(round_num)
+    days = datasets.days(round_num)
+    folds = []
+
+    for k in range(1, len(paths)):
+        key = "|".join([name, json.dumps(CURRENT, sort_keys=True)] + [_signature(p) for p in paths[:k + 1]])
+        if key not in cache:
+            constants = fit(paths[:k])
+            cache[key] = {
+                "train_days": days[:k],
+                "test_day": days[k],
+                "constants": constants,
+                "pnl": _test_pnl(round_num, k, product, constants),
+                "current_pnl": _test_pnl(round_num, k, product, CURRENT),
+            }
+        folds.append(cache[key])
+
+    return folds
+
+
+def _load_cache() -> dict:
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def calibrate(names: List[str] = None):
+    """
+    Runs the walk-forward folds of every fit in `names` (all by default), then fits each on all of its days
+
+    Returns:
+    - `{name: [fold, ...]}`
+    - `{constant: value}` of the fits on all days
+    """
+    names = names or list(FITS)
+    cache = _load_cache()
+    results = {name: walk_forward(name, cache) for name in names}
+    with open(CACHE_FILE, "w") as f:
+        json.dump(cache, f, indent=1)
+
+    constants = {}
+    for name in names:
+        round_num, fit, _ = FITS[name]
+        constants.update(fit(datasets.price_files(round_num)))
+    return results, constants
+
+
+if __name__ == "__main__":
+    results, constants = calibrate(sys.argv[1:])
+    print("{: <8} {: <10} {: >5} {: >12} {: >12}  constants".format("fit", "train", "test", "pnl", "current pnl"))
+    for name, folds in results.items():
+        for fold in folds:
+            print("{: <8} {: <10} {: >5} {: >12.1f} {: >12.1f}  {}".format(
+                name, ",".join(map(str, fold["train_days"])), fold["test_day"], fold["pnl"], fold["current_pnl"],
+                ", ".join("{}={:.6g}".format(k, v) for k, v in fold["constants"].items())))
+    print()
+    for name, value in constants.items():
+        print("{} = {!r}".format(name, value))
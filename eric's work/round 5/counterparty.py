@@ -0,0 +1,110 @@
+"""
+Who makes money against whom: mark to market pnl, volume and inventory path of every named
+counterparty in the *_wn trade files, for every product and day of a round in one pass.
+
+Each trade is split into a buyer leg (+quantity, -price*quantity cash) and a seller leg, and then
+everything is a groupby on (name, day, symbol) instead of filtering the trades once per name like
+the `pnl` helper in r1_testing_pnl.ipynb. Pnl is marked at the last mid of each day, same as there.
+
+Results are cached next to the data (CACHE_NAME in each round folder) and rebuilt when any of the
+round's csvs change.
+
+usage: python counterparty.py [round ...]
+"""
+import os
+import pickle
+import sys
+from typing import List
+
+import pandas as pd
+
+import datasets
+
+CACHE_NAME = "counterparty_cache.pkl"
+#bump this whenever the cached layout changes
+CACHE_VERSION = 1
+
+
+def load_round(round_num: int):
+    """ (prices, trades) of every day of a round concatenated, trades with a `day` column """
+    prices = pd.concat([datasets.load_prices(p) for p in datasets.price_files(round_num)], ignore_index=True)
+    trades = pd.concat([datasets.load_trades(p) for p in datasets.trade_files(round_num)], ignore_index=True)
+    return prices, trades
+
+
+def legs(trades: pd.DataFrame) -> pd.DataFrame:
+    """ one row per side of every trade: name, day, symbol, timestamp, signed quantity, cash """
+    columns = ["day", "symbol", "timestamp"]
+    quantity = trades["quantity"].to_numpy()
+    notional = (trades["price"] * trades["quantity"]).to_numpy()
+    buys = trades[columns].assign(name=trades["buyer"].to_numpy(), quantity=quantity, cash=-notional)
+    sells = trades[columns].assign(name=trades["seller"].to_numpy(), quantity=-quantity, cash=notional)
+    out = pd.concat([buys, sells], ignore_index=True)
+    #keep trade order within a timestamp so the cumsums below walk the day in order
+    return out.sort_values(["day", "timestamp"], kind="stable").reset_index(drop=True)
+
+
+def attribute(prices: pd.DataFrame, trades: pd.DataFrame):
+    """
+    Parameters:
+    - `prices`, `trades` - any number of days/products, e.g. from `load_round`
+
+    Returns:
+    - `summary` - one row per (name, day, symbol): pnl, volume, trades, final position
+    - `paths` - one row per leg with the name's running position and mark to market pnl after it
+    """
+    legs_ = legs(trades)
+    keys = ["name", "day", "symbol"]
+
+    mids = prices.rename(columns={"product": "symbol"})[["day", "symbol", "timestamp", "mid_price"]]
+    last_mid = mids.sort_values("timestamp").groupby(["day", "symbol"])["mid_price"].last().rename("last_mid")
+    legs_ = legs_.merge(mids, on=["day", "symbol", "timestamp"], how="left")
+
+    grouped = legs_.groupby(keys, sort=False)
+    legs_["position"] = grouped["quantity"].cumsum()
+    legs_["cash_total"] = grouped["cash"].cumsum()
+    legs_["pnl"] = legs_["cash_total"] + legs_["position"] * legs_["mid_price"]
+
+    summary = legs_.assign(volume=legs_["quantity"].abs()).groupby(keys).agg(
+        cash=("cash", "sum"), position=("quantity", "sum"), volume=("volume", "sum"), trades=("quantity", "size"))
+    summary = summary.join(last_mid, on=["day", "symbol"])
+    summary["pnl"] = summary["cash"] + summary["position"] * summary["last_mid"]
+
+    paths = legs_[keys + ["timestamp", "quantity", "position", "pnl"]]
+    return summary.reset_index()[keys + ["pnl", "volume", "trades", "position"]], paths
+
+
+def _signature(round_num: int) -> tuple:
+    files = datasets.price_files(round_num) + datasets.trade_files(round_num)
+    return (CACHE_VERSION,) + tuple((os.path.basename(f), os.path.getsize(f), int(os.path.getmtime(f))) for f in files)
+
+
+def load(round_num: int, use_cache: bool = True):
+    """ `attribute` of a whole round, cached in the round's data folder """
+    path = os.path.join(datasets.ROUND_DIRS[round_num], CACHE_NAME)
+    signature = _signature(round_num)
+    if use_cache and os.path.exists(path):
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+        if cached["signature"] == signature:
+            return cached["summary"], cached["paths"]
+
+    summary, paths = attribute(*load_round(round_num))
+    if use_cache:
+        with open(path, "wb") as f:
+            pickle.dump({"signature": signature, "summary": summary, "paths": paths}, f)
+    return summary, paths
+
+
+def leaderboard(rounds: List[int] = None) -> pd.DataFrame:
+    """ pnl and volume per (name, symbol) summed over every day of `rounds` (all of them by default) """
+    rounds = rounds or sorted(datasets.ROUND_DIRS)
+    summary = pd.concat([load(r)[0].assign(round=r) for r in rounds], ignore_index=True)
+    board = summary.groupby(["round", "symbol", "name"])[["pnl", "volume", "trades"]].sum()
+    return board.sort_values(["round", "symbol", "pnl"], ascending=[True, True, False])
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_rows", 500)
+    print(leaderboard([int(r) for r in sys.argv[1:]]).round(1))
@@ -0,0 +1,153 @@
+"""
+Drop-in `__slots__` versions of the classes in datamodel.py for the backtester/research code.
+
+Same constructor signatures and attribute names as datamodel.py, so strategy code can't tell the
+difference. Slotted instances have no real `__dict__`, which is what `ProsperityEncoder` and
+`TradingState.toJSON` serialise with, so `_Slotted` exposes a read-only `__dict__` built from the
+slots. Listings also support `listing["symbol"]` since that's how Logger.compress_listings reads them.
+
+Don't submit this file, the exchange only knows about datamodel.py.
+"""
+import json
+from typing import Dict, List
+
+import jsonpickle
+
+from datamodel import ObservationValue, Position, Product, Symbol, Time, UserId, ProsperityEncoder
+
+
+class _Slotted:
+    __slots__ = ()
+
+    @property
+    def __dict__(self) -> dict:
+        #compat shim: ProsperityEncoder/toJSON/vars() all go through o.__dict__
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __getitem__(self, name: str):
+        return getattr(self, name)
+
+
+class Listing(_Slotted):
+    __slots__ = ("symbol", "product", "denomination")
+
+    def __init__(self, symbol: Symbol, product: Product, denomination: Product):
+        self.symbol = symbol
+        self.product = product
+        self.denomination = denomination
+
+
+class ConversionObservation(_Slotted):
+    __slots__ = ("bidPrice", "askPrice", "transportFees", "exportTariff", "importTariff", "sunlight", "humidity")
+
+    def __init__(self, bidPrice: float, askPrice: float, transportFees: float, exportTariff: float, importTariff: float, sunlight: float, humidity: float):
+        self.bidPrice = bidPrice
+        self.askPrice = askPrice
+        self.transportFees = transportFees
+        self.exportTariff = exportTariff
+        self.importTariff = importTariff
+        self.sunlight = sunlight
+        self.humidity = humidity
+
+
+class Observation(_Slotted):
+    __slots__ = ("plainValueObservations", "conversionObservations")
+
+    def __init__(self, plainValueObservations: Dict[Product, ObservationValue], conversionObservations: Dict[Product, ConversionObservation]) -> None:
+        self.plainValueObservations = plainValueObservations
+        self.conversionObservations = conversionObservations
+
+    def __str__(self) -> str:
+        return "(plainValueObservations: " + jsonpickle.encode(self.plainValueObservations) + ", conversionObservations: " + jsonpickle.encode(self.conversionObservations) + ")"
+
+
+class Order(_Slotted):
+    __slots__ = ("symbol", "price", "quantity")
+
+    def __init__(self, symbol: Symbol, price: int, quantity: int) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+
+    def __str__(self) -> str:
+        return "(" + self.symbol + ", " + str(self.price) + ", " + str(self.quantity) + ")"
+
+    def __repr__(self) -> str:
+        return "(" + self.symbol + ", " + str(self.price) + ", " + str(self.quantity) + ")"
+
+
+class OrderDepth(_Slotted):
+    __slots__ = ("buy_orders", "sell_orders")
+
+    def __init__(self):
+        self.buy_orders: Dict[int, int] = {}
+        self.sell_orders: Dict[int, int] = {}
+
+
+class Trade(_Slotted):
+    __slots__ = ("symbol", "price", "quantity", "buyer", "seller", "timestamp")
+
+    def __init__(self, symbol: Symbol, price: int, quantity: int, buyer: UserId=None, seller: UserId=None, timestamp: int=0) -> None:
+        self.symbol = symbol
+        self.price: int = price
+        self.quantity: int = quantity
+        self.buyer = buyer
+        self.seller = seller
+        self.timestamp = timestamp
+
+    def __str__(self) -> str:
+        return "(" + self.symbol + ", " + self.buyer + " << " + self.seller + ", " + str(self.price) + ", " + str(self.quantity) + ", " + str(self.timestamp) + ")"
+
+    def __repr__(self) -> str:
+        return "(" + self.symbol + ", " + self.buyer + " << " + self.seller + ", " + str(self.price) + ", " + str(self.quantity) + ", " + str(self.timestamp) + ")"
+
+
+class TradingState(_Slotted):
+    __slots__ = ("traderData", "timestamp", "listings", "order_depths", "own_trades", "market_trades", "position", "observations")
+
+    def __init__(self,
+                 traderData: str,
+                 timestamp: Time,
+                 listings: Dict[Symbol, Listing],
+                 order_depths: Dict[Symbol, OrderDepth],
+                 own_trades: Dict[Symbol, List[Trade]],
+                 market_trades: Dict[Symbol, List[Trade]],
+                 position: Dict[Product, Position],
+                 observations: Observation):
+        self.traderData = traderData
+        self.timestamp = timestamp
+        self.listings = listings
+        self.order_depths = order_depths
+        self.own_trades = own_trades
+        self.market_trades = market_trades
+        self.position = position
+        self.observations = observations
+
+    def toJSON(self):
+        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True)
+
+
+def to_datamodel(obj, module=None):
+    """
+    Converts a slotted object (and everything nested inside it) back into the plain datamodel.py
+    classes, for anything that insists on the real thing (e.g. isinstance checks)
+
+    Parameters:
+    - `obj` - slotted object, or a dict/list containing them
+    - `module` - datamodel module to convert into, defaults to `import datamodel`
+    """
+    if module is None:
+        import datamodel as module
+
+    if isinstance(obj, dict):
+        return {k: to_datamodel(v, module) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [to_datamodel(v, module) for v in obj]
+    if not isinstance(obj, _Slotted):
+        return obj
+
+    plain = getattr(module, type(obj).__name__).__new__(getattr(module, type(obj).__name__))
+    for name in obj.__slots__:
+        setattr(plain, name, to_datamodel(getattr(obj, name), module))
+    return plain
+
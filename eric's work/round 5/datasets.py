@@ -0,0 +1,44 @@
+import glob
+import os
+import re
+from typing import List
+
+import pandas as pd
+
+#all the round data we kept around, one folder per round
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "round 5 data")
+ROUND_DIRS = {
+    1: os.path.join(DATA_DIR, "round1 analysis"),
+    3: os.path.join(DATA_DIR, "round3 analysis"),
+    4: os.path.join(DATA_DIR, "round4 analysis"),
+}
+
+_DAY = re.compile(r"day_(-?\d+)")
+
+
+def _day_of(path: str) -> int:
+    return int(_DAY.search(os.path.basename(path)).group(1))
+
+
+def price_files(round_num: int) -> List[str]:
+    """ prices_round_X_day_Y.csv files for a round, sorted by day """
+    return sorted(glob.glob(os.path.join(ROUND_DIRS[round_num], "prices_round_*_day_*.csv")), key=_day_of)
+
+
+def trade_files(round_num: int) -> List[str]:
+    """ trades_round_X_day_Y_wn.csv files (with counterparty names) for a round, sorted by day """
+    return sorted(glob.glob(os.path.join(ROUND_DIRS[round_num], "trades_round_*_day_*.csv")), key=_day_of)
+
+
+def days(round_num: int) -> List[int]:
+    return [_day_of(f) for f in price_files(round_num)]
+
+
+def load_prices(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, delimiter=";")
+
+
+def load_trades(path: str) -> pd.DataFrame:
+    trades = pd.read_csv(path, delimiter=";")
+    trades["day"] = _day_of(path)
+    return trades
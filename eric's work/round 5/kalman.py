@@ -0,0 +1,74 @@
+"""
+Fits the local level model behind round5.kalman_update:
+
+    observed wall mid y_t = x_t + e_t,  e ~ N(0, R)    (bounce between the quoted walls)
+    fair value        x_t = x_{t-1} + w_t,  w ~ N(0, Q)
+
+The tick to tick change d_t = w_t + e_t - e_{t-1} has Var(d) = Q + 2R and Cov(d_t, d_{t-1}) = -R,
+so both variances come straight out of the first two autocovariances of the mid changes, one
+vectorized pass over every day in the csvs, no likelihood search.
+
+usage: python kalman.py [product]   (prints the constants to paste into round5.py)
+"""
+import sys
+from typing import List
+
+import numpy as np
+
+import datasets
+from array_book import BookFrame
+
+
+def wall_mid(frame: BookFrame) -> np.ndarray:
+    """ (worst bid + worst ask) / 2, the mid trade_starfruit_v2 works off """
+    return (frame.worst_bid + frame.worst_ask) / 2
+
+
+def fit(mids: List[np.ndarray]):
+    """
+    Parameters:
+    - `mids` - one observed price series per day, changes are never taken across days
+
+    Returns:
+    - (Q, R) process and observation noise variances
+    """
+    diffs = [np.diff(m[~np.isnan(m)]) for m in mids]
+    d = np.concatenate(diffs)
+    mean = d.mean()
+    var = np.mean((d - mean) ** 2)
+    lag1 = np.concatenate([(x[1:] - mean) * (x[:-1] - mean) for x in diffs]).mean()
+    r = max(-lag1, 0.0)
+    q = max(var - 2 * r, 1e-6)
+    return float(q), float(r)
+
+
+def steady_gain(q: float, r: float) -> float:
+    """ the gain the filter settles at, i.e. the weight of an equivalent EMA """
+    #steady state prior variance p solves p = (p r / (p + r)) + q
+    p = (q + np.sqrt(q * q + 4 * q * r)) / 2
+    return p / (p + r)
+
+
+def filter_path(observations, q: float, r: float) -> np.ndarray:
+    """ round5.kalman_update run over a whole series, for plots and checks """
+    import round5
+
+    out = np.empty(len(observations))
+    mean, var = None, 0.0
+    for i, y in enumerate(observations):
+        mean, var = round5.kalman_update(mean, var, float(y), q, r)
+        out[i] = mean
+    return out
+
+
+def fit_product(product: str = "STARFRUIT", round_num: int = 1):
+    mids = [wall_mid(BookFrame.from_prices(datasets.load_prices(p), product)) for p in datasets.price_files(round_num)]
+    return fit(mids)
+
+
+if __name__ == "__main__":
+    product = sys.argv[1] if len(sys.argv) > 1 else "STARFRUIT"
+    q, r = fit_product(product)
+    print("{}_Q = {!r}".format(product, q))
+    print("{}_R = {!r}".format(product, r))
+    print("steady state gain {:.4f}".format(steady_gain(q, r)))
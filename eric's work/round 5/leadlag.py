@@ -0,0 +1,122 @@
+"""
+Cross-correlation of mid price returns between every pair of products over a range of lags, to find
+out if anything leads anything (COCONUT -> COUPON, STRAWBERRIES -> GIFT_BASKET, ...) instead of
+eyeballing overlaid plots.
+
+All products of a day are one (products, ticks) array and every pair's correlation at every lag comes
+from a single FFT: corr(a, b, lag) = sum_t a[t] * b[t - lag] / T on standardised returns, so a peak at
+a positive lag means b moves first and a follows `lag` ticks later.
+
+usage: python leadlag.py [max_lag]
+"""
+import sys
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+import datasets
+from array_book import BookFrame
+
+MAX_LAG = 20
+#correlations under NOISE_Z / sqrt(ticks) are noise. ~2 would do for one lag, but we look at 2 * MAX_LAG of them
+NOISE_Z = 4
+
+
+def returns(mid) -> np.ndarray:
+    """ tick to tick mid changes, missing mids carry the last one forward so they count as no move """
+    mid = pd.Series(mid).ffill().bfill().to_numpy(dtype=float)
+    return np.diff(mid, prepend=mid[0])
+
+
+def cross_correlation(series: np.ndarray, max_lag: int = MAX_LAG) -> np.ndarray:
+    """
+    Parameters:
+    - `series` - (products, ticks) returns of one day, all on the same timestamps
+
+    Returns:
+    - (products, products, 2 * max_lag + 1) correlations, [a, b, max_lag + k] = corr(a[t], b[t - k])
+    """
+    x = series - series.mean(axis=1, keepdims=True)
+    std = x.std(axis=1, keepdims=True)
+    x = np.divide(x, std, out=np.zeros_like(x), where=std > 0)
+    n = x.shape[1]
+    #zero padding to 2n turns the circular correlation into a linear one
+    f = np.fft.rfft(x, n=2 * n, axis=1)
+    full = np.fft.irfft(f[:, None, :] * np.conj(f[None, :, :]), n=2 * n, axis=2) / n
+    lags = np.arange(-max_lag, max_lag + 1)
+    return full[:, :, lags % (2 * n)]
+
+
+def day_series(prices: pd.DataFrame, synthetic: bool = True) -> Dict[str, np.ndarray]:
+    """ returns of every product in one prices csv, plus the basket's constituents as one series if they're there """
+    mid = {p: frame.mid_price for p, frame in BookFrame.all_products(prices).items()}
+    if synthetic and all(p in mid for p in ["CHOCOLATE", "STRAWBERRIES", "ROSES"]):
+        mid["CONSTITUENTS"] = 4 * mid["CHOCOLATE"] + 6 * mid["STRAWBERRIES"] + mid["ROSES"]
+    return {p: returns(m) for p, m in sorted(mid.items())}
+
+
+def lead_lag(days: List[Dict[str, np.ndarray]], max_lag: int = MAX_LAG) -> pd.DataFrame:
+    """
+    Parameters:
+    - `days` - one `day_series` dict per day, same products every day
+
+    Returns:
+    - one row per pair (a, b) with the lag 0 correlation, the best non-zero lag (positive = b leads a)
+      and its correlation averaged over days, on how many days that lag is the best one, and the
+      NOISE_Z/sqrt(ticks) noise level
+    """
+    products = list(days[0])
+    per_day = np.stack([cross_correlation(np.stack([d[p] for p in products]), max_lag) for d in days])
+    mean = per_day.mean(axis=0)
+    lags = np.arange(-max_lag, max_lag + 1)
+    nonzero = lags != 0
+    noise = NOISE_Z / np.sqrt(min(len(d[products[0]]) for d in days) * len(days))
+
+    rows = []
+    for i, a in enumerate(products):
+        for j, b in enumerate(products):
+            if j <= i:
+                continue
+            best = np.flatnonzero(nonzero)[np.argmax(np.abs(mean[i, j, nonzero]))]
+            daily_best = np.flatnonzero(nonzero)[np.argmax(np.abs(per_day[:, i, j, nonzero]), axis=1)]
+            rows.append({
+                "a": a, "b": b,
+                "corr_0": mean[i, j, max_lag],
+                "lag": int(lags[best]),
+                "corr_lag": mean[i, j, best],
+                "days_agree": int(np.sum(daily_best == best)),
+                "noise": noise,
+            })
+    return pd.DataFrame(rows)
+
+
+def leaders(table: pd.DataFrame, days: int) -> pd.DataFrame:
+    """ the pairs whose best lag stands out from the noise on most days, written as leader -> follower """
+    found = table[(np.abs(table["corr_lag"]) > table["noise"]) & (table["days_agree"] * 2 > days)].copy()
+    found["leader"] = np.where(found["lag"] > 0, found["b"], found["a"])
+    found["follower"] = np.where(found["lag"] > 0, found["a"], found["b"])
+    found["ticks"] = np.abs(found["lag"])
+    return found[["leader", "follower", "ticks", "corr_lag", "corr_0", "days_agree"]]
+
+
+def scan(rounds=None, max_lag: int = MAX_LAG) -> Dict[int, pd.DataFrame]:
+    """ `lead_lag` over every day of each round """
+    rounds = rounds or sorted(datasets.ROUND_DIRS)
+    return {r: lead_lag([day_series(datasets.load_prices(p)) for p in datasets.price_files(r)], max_lag) for r in rounds}
+
+
+if __name__ == "__main__":
+    import time
+
+    pd.set_option("display.width", 200)
+    max_lag = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_LAG
+    start = time.perf_counter()
+    tables = scan(max_lag=max_lag)
+    elapsed = time.perf_counter() - start
+    for r, table in tables.items():
+        print("round", r)
+        print(table.round(4).to_string(index=False))
+        print(leaders(table, len(datasets.days(r))).round(4).to_string(index=False))
+        print()
+    print("{:.2f} s including csv loading".format(elapsed))
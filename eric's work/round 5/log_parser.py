@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+#sections of an exchange (or prosperity2bt) .log file, in the order they appear
+SANDBOX_HEADER = "Sandbox logs:"
+ACTIVITIES_HEADER = "Activities log:"
+TRADES_HEADER = "Trade History:"
+
+#bump this whenever the cached layout changes so old .npz files get rebuilt
+CACHE_VERSION = 1
+
+LIMIT_MSG = re.compile(r"Orders for product (\w+) exceeded limit")
+
+
+class ProductLog:
+    """
+    Columnar view of one product in a log.
+
+    Per activity row (one per tick):
+    - `timestamp`, `mid_price`, `pnl`, `position`
+
+    Per own fill (SUBMISSION on either side):
+    - `fill_timestamp`, `fill_price`, `fill_quantity` (signed, + is a buy)
+
+    Per tick where the exchange threw away our orders for being over the limit:
+    - `rejected_timestamp`
+    """
+
+    def __init__(self, product: str, timestamp, mid_price, pnl, fill_timestamp, fill_price, fill_quantity, rejected_timestamp) -> None:
+        self.product = product
+        self.timestamp = timestamp
+        self.mid_price = mid_price
+        self.pnl = pnl
+        self.fill_timestamp = fill_timestamp
+        self.fill_price = fill_price
+        self.fill_quantity = fill_quantity
+        self.rejected_timestamp = rejected_timestamp
+
+        #fills at tick t already show up in the pnl of tick t, so they count towards the position at t
+        filled = np.concatenate(([0], np.cumsum(fill_quantity)))
+        self.position = filled[np.searchsorted(fill_timestamp, timestamp, side="right")]
+
+    def __repr__(self) -> str:
+        return "ProductLog(" + self.product + ", ticks=" + str(len(self.timestamp)) + ", fills=" + str(len(self.fill_timestamp)) + ")"
+
+
+def _parse_sandbox_entry(entry: dict, rejected: Dict[str, List[int]]) -> None:
+    sandbox_log = entry.get("sandboxLog", "")
+    if not sandbox_log:
+        return
+    for product in LIMIT_MSG.findall(sandbox_log):
+        rejected.setdefault(product, []).append(entry["timestamp"])
+
+
+def _parse_activity_row(line: str, activities: Dict[str, List[list]]) -> None:
+    #day;timestamp;product;bid_price_1;...;ask_volume_3;mid_price;profit_and_loss
+    cols = line.split(";")
+    activities.setdefault(cols[2], []).append([int(cols[1]), float(cols[-2] or "nan"), float(cols[-1] or 0)])
+
+
+def parse_log(path: str) -> Dict[str, ProductLog]:
+    """
+    Reads a log line by line (no full read into memory apart from the trade history)
+
+    Parameters:
+    - `path` - path to the .log file
+
+    Returns:
+    - `Dict[str, ProductLog]` keyed by product
+    """
+    section = None
+    rejected: Dict[str, List[int]] = {}
+    activities: Dict[str, List[list]] = {}
+    buffer: List[str] = []
+
+    with open(path) as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped == SANDBOX_HEADER:
+                section = "sandbox"
+                continue
+            if stripped == ACTIVITIES_HEADER:
+                section = "activities_header"
+                continue
+            if stripped == TRADES_HEADER:
+                section = "trades"
+                continue
+            if not stripped:
+                continue
+
+            if section == "sandbox":
+                #each sandbox entry is a pretty printed json object starting/ending at column 0
+                buffer.append(line)
+                if line.startswith("}"):
+                    _parse_sandbox_entry(json.loads("".join(buffer)), rejected)
+                    buffer = []
+            elif section == "activities_header":
+                section = "activities"
+            elif section == "activities":
+                _parse_activity_row(stripped, activities)
+            elif section == "trades":
+                buffer.append(line)
+
+    trades = json.loads("".join(buffer)) if buffer else []
+    fills: Dict[str, List[list]] = {}
+    for trade in trades:
+        if trade["buyer"] == "SUBMISSION":
+            fills.setdefault(trade["symbol"], []).append([trade["timestamp"], trade["price"], trade["quantity"]])
+        elif trade["seller"] == "SUBMISSION":
+            fills.setdefault(trade["symbol"], []).append([trade["timestamp"], trade["price"], -trade["quantity"]])
+
+    result = {}
+    for product, rows in activities.items():
+        rows = np.array(rows, dtype=float)
+        product_fills = np.array(fills.get(product, []), dtype=float).reshape(-1, 3)
+        #trade history is already in time order, stable sort just in case it isn't
+        product_fills = product_fills[np.argsort(product_fills[:, 0], kind="stable")]
+        result[product] = ProductLog(
+            product,
+            rows[:, 0].astype(np.int64),
+            rows[:, 1],
+            rows[:, 2],
+            product_fills[:, 0].astype(np.int64),
+            product_fills[:, 1],
+            product_fills[:, 2].astype(np.int64),
+            np.array(rejected.get(product, []), dtype=np.int64),
+        )
+
+    return result
+
+
+def _cache_path(path: str) -> str:
+    return path + ".npz"
+
+
+def _save_cache(path: str, parsed: Dict[str, ProductLog]) -> None:
+    arrays = {"__version__": np.array(CACHE_VERSION)}
+    for product, log in parsed.items():
+        for field in ("timestamp", "mid_price", "pnl", "fill_timestamp", "fill_price", "fill_quantity", "rejected_timestamp"):
+            arrays[product + "/" + field] = getattr(log, field)
+    np.savez_compressed(_cache_path(path), **arrays)
+
+
+def _load_cache(path: str):
+    cache = _cache_path(path)
+    if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(path):
+        return None
+
+    with np.load(cache) as data:
+        if "__version__" not in data.files or int(data["__version__"]) != CACHE_VERSION:
+            return None
+        fields: Dict[str, dict] = {}
+        for key in data.files:
+            if key == "__version__":
+                continue
+            product, field = key.split("/")
+            fields.setdefault(product, {})[field] = data[key]
+
+    return {product: ProductLog(product, **f) for product, f in fields.items()}
+
+
+def load_log(path: str, use_cache: bool = True) -> Dict[str, ProductLog]:
+    """
+    Same as `parse_log` but goes through a `<log>.npz` cache sitting next to the log,
+    rebuilt whenever the log is newer than the cache
+    """
+    if use_cache:
+        cached = _load_cache(path)
+        if cached is not None:
+            return cached
+
+    parsed = parse_log(path)
+    if use_cache:
+        _save_cache(path, parsed)
+    return parsed
+
+
+def max_drawdown(pnl) -> float:
+    if len(pnl) == 0:
+        return 0.0
+    return float(np.max(np.maximum.accumulate(pnl) - pnl))
+
+
+def summarize(paths: List[str]) -> List[dict]:
+    """
+    One row per (log, product) with final pnl, max drawdown, traded volume and rejected ticks,
+    plus a "TOTAL" row per log
+    """
+    rows = []
+    for path in paths:
+        parsed = load_log(path)
+        total = None
+        for product in sorted(parsed):
+            log = parsed[product]
+            rows.append({
+                "log": path,
+                "product": product,
+                "pnl": float(log.pnl[-1]) if len(log.pnl) else 0.0,
+                "max_drawdown": max_drawdown(log.pnl),
+                "volume": int(np.abs(log.fill_quantity).sum()),
+                "max_abs_position": int(np.abs(log.position).max()) if len(log.position) else 0,
+                "rejected_ticks": len(log.rejected_timestamp),
+            })
+            total = log.pnl.copy() if total is None else total + log.pnl
+        if total is not None:
+            rows.append({
+                "log": path,
+                "product": "TOTAL",
+                "pnl": float(total[-1]),
+                "max_drawdown": max_drawdown(total),
+                "volume": sum(r["volume"] for r in rows if r["log"] == path),
+                "max_abs_position": 0,
+                "rejected_ticks": sum(r["rejected_ticks"] for r in rows if r["log"] == path),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    #usage: python log_parser.py some.log other.log ...
+    rows = summarize(sys.argv[1:])
+    print("{: <60} {: <16} {: >12} {: >12} {: >8} {: >8} {: >9}".format("log", "product", "pnl", "max_dd", "volume", "max_pos", "rejected"))
+    for r in rows:
+        print("{: <60} {: <16} {: >12.1f} {: >12.1f} {: >8} {: >8} {: >9}".format(
+            r["log"][-60:], r["product"], r["pnl"], r["max_drawdown"], r["volume"], r["max_abs_position"], r["rejected_ticks"]))
@@ -0,0 +1,145 @@
+"""
+Markouts of our own fills: how far the mid moved in our favour 1/5/20/100 ticks after each fill,
+per unit, so a buy at 9998 with the mid at 10001 twenty ticks later is +3 at +20.
+
+Fills come either from a backtest (`from_backtest`, which knows which fills crossed the book) or from
+a parsed exchange log (`from_log`, where a fill is counted as aggressive if it traded at or through
+the mid of its tick, since the log doesn't say). Every fill is matched to its tick with one
+searchsorted per product, the horizons are then plain index offsets.
+
+Offsets are (fill price - fair) signed so that negative = we got a better price than fair, i.e.
+buying below / selling above it. Fair defaults to the mid of the fill's tick.
+
+usage: python markouts.py [some.log ...]   (no logs: backtest round 1 day 0 instead)
+"""
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+HORIZONS = (1, 5, 20, 100)
+#offsets further out than this get lumped into the end buckets
+MAX_OFFSET = 5
+
+
+def markouts(timestamp, mid, fill_timestamp, fill_price, fill_quantity, horizons=HORIZONS) -> np.ndarray:
+    """
+    Parameters:
+    - `timestamp`, `mid` - one product's per-tick timestamps (sorted) and mid prices
+    - `fill_timestamp`, `fill_price`, `fill_quantity` - our fills, quantity signed (+ = buy)
+
+    Returns:
+    - (fills, horizons) per unit markout, NaN where the horizon runs past the end of the data
+    """
+    timestamp = np.asarray(timestamp)
+    mid = np.asarray(mid, dtype=float)
+    idx = np.searchsorted(timestamp, fill_timestamp, side="left")
+    ahead = idx[:, None] + np.asarray(horizons)[None, :]
+    future = np.where(ahead < len(mid), mid[np.minimum(ahead, len(mid) - 1)], np.nan)
+    side = np.sign(np.asarray(fill_quantity, dtype=float))[:, None]
+    return side * (future - np.asarray(fill_price, dtype=float)[:, None])
+
+
+def fill_table(product: str, timestamp, mid, fill_timestamp, fill_price, fill_quantity, aggressive, fair=None, horizons=HORIZONS) -> pd.DataFrame:
+    """
+    One row per fill with its product, kind (aggressive/passive), offset from fair and markouts
+
+    Parameters:
+    - `aggressive` - bool per fill
+    - `fair` - None (mid at the fill), a number (e.g. 10000 for AMETHYSTS) or a per-tick array like `mid`
+    """
+    fill_price = np.asarray(fill_price, dtype=float)
+    idx = np.minimum(np.searchsorted(timestamp, fill_timestamp, side="left"), len(timestamp) - 1)
+    if fair is None:
+        fair_at_fill = np.asarray(mid, dtype=float)[idx]
+    elif np.ndim(fair) == 0:
+        fair_at_fill = np.full(len(fill_price), float(fair))
+    else:
+        fair_at_fill = np.asarray(fair, dtype=float)[idx]
+
+    side = np.sign(np.asarray(fill_quantity))
+    offset = side * (fill_price - fair_at_fill)
+    table = pd.DataFrame({
+        "product": product,
+        "timestamp": fill_timestamp,
+        "price": fill_price,
+        "quantity": np.abs(fill_quantity),
+        "kind": np.where(aggressive, "aggressive", "passive"),
+        "offset": np.clip(np.round(offset), -MAX_OFFSET, MAX_OFFSET).astype(int),
+    })
+    for h, column in zip(horizons, markouts(timestamp, mid, fill_timestamp, fill_price, fill_quantity, horizons).T):
+        table["+" + str(h)] = column
+    return table
+
+
+def from_backtest(result, books, fair: Dict[str, object] = None) -> pd.DataFrame:
+    """
+    Parameters:
+    - `result` - `BacktestResult`
+    - `books` - `Dict[str, BookFrame]` of the same day (for the mids)
+    - `fair` - optional per product fair value, see `fill_table`
+    """
+    fair = fair or {}
+    tables = []
+    for product in sorted(result.pnl):
+        ts, price, qty, aggressive = result.fill_arrays(product)
+        if len(ts):
+            frame = books[product]
+            tables.append(fill_table(product, frame.timestamp, frame.mid_price, ts, price, qty, aggressive, fair.get(product)))
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+def from_log(logs, fair: Dict[str, object] = None) -> pd.DataFrame:
+    """
+    Parameters:
+    - `logs` - `Dict[str, ProductLog]` from `log_parser.load_log`
+    - `fair` - optional per product fair value, see `fill_table`
+    """
+    fair = fair or {}
+    tables = []
+    for product in sorted(logs):
+        log = logs[product]
+        if len(log.fill_timestamp) == 0:
+            continue
+        idx = np.minimum(np.searchsorted(log.timestamp, log.fill_timestamp, side="left"), len(log.timestamp) - 1)
+        aggressive = np.sign(log.fill_quantity) * (log.fill_price - log.mid_price[idx]) >= 0
+        tables.append(fill_table(product, log.timestamp, log.mid_price, log.fill_timestamp, log.fill_price,
+                                 log.fill_quantity, aggressive, fair.get(product)))
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+def summarize(table: pd.DataFrame, by=("product", "kind", "offset")) -> pd.DataFrame:
+    """ fill count, volume and volume weighted mean markout per horizon for each group """
+    horizons = [c for c in table.columns if c.startswith("+")]
+    weighted = table[horizons].mul(table["quantity"], axis=0)
+    weighted[list(by)] = table[list(by)]
+    weighted["quantity"] = table["quantity"]
+    #weights only count where the markout exists, the end of the day has no +100
+    for h in horizons:
+        weighted["w" + h] = table["quantity"].where(table[h].notna(), 0)
+    grouped = weighted.groupby(list(by))
+    sums = grouped.sum()
+    out = pd.DataFrame({"fills": grouped.size(), "volume": sums["quantity"]})
+    for h in horizons:
+        out[h] = sums[h] / sums["w" + h]
+    return out
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_rows", 200)
+    if len(sys.argv) > 1:
+        import log_parser
+
+        tables = [from_log(log_parser.load_log(path), {"AMETHYSTS": 10000}) for path in sys.argv[1:]]
+        table = pd.concat(tables, ignore_index=True)
+    else:
+        import backtester
+        import round5
+        from array_book import BookFrame
+
+        prices, trades = backtester.load_day(1, 0)
+        table = from_backtest(backtester.run_backtest(round5.Trader(), prices, trades), BookFrame.all_products(prices), {"AMETHYSTS": 10000})
+    print(summarize(table, ("product", "kind")).round(2))
+    print(summarize(table).round(2))
@@ -0,0 +1,159 @@
+"""
+ORCHIDS replay for the conversion planners in round5.py (Trader.orchid_planner 'greedy' vs 'one_step').
+
+backtester.py has no conversions and no south quotes, and the round 2 csvs only have the south mid, so
+this replays the round 2 sandbox log, the one file with the local book and the full ConversionObservation
+on every tick. Per tick, in the order the exchange does it:
+- the conversion request goes through at this tick's south quotes (only against a position we hold,
+  never more than it)
+- our orders are matched against the local book, the orders of a side are dropped if they could break
+  the limit
+- whatever rests fills at its own price against the next tick's book if that book trades through it, the
+  only evidence of passive fills we have (the log has 9 ORCHIDS market trades)
+- net longs pay round5.ORCHID_STORAGE
+- the fills come back as own_trades on the next tick, like on the exchange
+Anything left at the end is converted at the last south quotes.
+
+usage: python orchids.py   (prints ORCHID_FILL, then greedy vs one_step)
+"""
+import json
+import math
+import os
+import re
+import time
+from typing import List
+
+import numpy as np
+
+import datamodel
+import round5
+
+LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "round 2", "round 2 data", "log_file.log")
+PRODUCT = "ORCHIDS"
+
+
+def load_log(path: str = LOG_FILE) -> List[tuple]:
+    """ (timestamp, bids, asks, south) per tick: books best first with positive volumes, south = ConversionObservation args """
+    with open(path) as f:
+        sandbox = f.read().split("Activities log:")[0]
+    ticks = []
+    for raw in re.findall(r'"lambdaLog": (".*?[^\\]"),\n', sandbox):
+        state = json.loads(json.loads(raw))[0]
+        buy_orders, sell_orders = state[3][PRODUCT]
+        bids = sorted(((int(p), v) for p, v in buy_orders.items()), reverse=True)
+        asks = sorted((int(p), -v) for p, v in sell_orders.items())
+        ticks.append((state[0], bids, asks, state[7][1][PRODUCT]))
+    return ticks
+
+
+def south_prices(south) -> tuple:
+    """ (cost of importing one unit, proceeds of exporting one), fees and tariffs included """
+    bid, ask, transport, export_tariff, import_tariff = south[:5]
+    return ask + transport + import_tariff, bid - transport - export_tariff
+
+
+def fit_fill(ticks: List[tuple]) -> float:
+    """ how often the next book trades through the sell quote the planner rests at (ceil(south buy) + 1, inside the bid) """
+    hits = 0
+    for (_, bids, _, south), (_, next_bids, _, _) in zip(ticks[:-1], ticks[1:]):
+        quote = max(math.ceil(south_prices(south)[0]) + 1, bids[0][0] + 1)
+        hits += next_bids[0][0] >= quote
+    return hits / (len(ticks) - 1)
+
+
+def _state(timestamp, bids, asks, south, position, own_trades) -> datamodel.TradingState:
+    depth = datamodel.OrderDepth()
+    depth.buy_orders = dict(bids)
+    depth.sell_orders = {price: -volume for price, volume in asks}
+    observation = datamodel.Observation({}, {PRODUCT: datamodel.ConversionObservation(*south)})
+    listings = {PRODUCT: datamodel.Listing(PRODUCT, PRODUCT, "SEASHELLS")}
+    return datamodel.TradingState("", timestamp, listings, {PRODUCT: depth}, {PRODUCT: own_trades}, {}, {PRODUCT: position}, observation)
+
+
+def _match(orders, levels, sign, filled, resting=False):
+    """
+    fills of our orders (buys: sign 1) against book levels as [(price, signed quantity)]. `filled` carries
+    what each order already got, `resting` orders fill at their own price instead of the level's
+    """
+    fills = []
+    for order in orders:
+        if order.quantity * sign <= 0:
+            continue
+        wanted = abs(order.quantity) - filled.get(id(order), 0)
+        for i, (price, volume) in enumerate(levels):
+            if wanted <= 0 or (price > order.price if sign > 0 else price < order.price) or volume <= 0:
+                continue
+            fill = min(wanted, volume)
+            levels[i] = (price, volume - fill)
+            fills.append((order.price if resting else price, sign * fill))
+            wanted -= fill
+        filled[id(order)] = abs(order.quantity) - wanted
+    return fills
+
+
+def simulate(trader: round5.Trader, ticks: List[tuple]) -> dict:
+    """ pnl, traded volume, conversions, storage paid and planner time per tick of `trader` over `ticks` """
+    pickled_data = round5.PickledData()
+    position, cash, storage, volume, converted, elapsed = 0, 0.0, 0.0, 0, 0, 0.0
+    limit = round5.POSITION_LIMITS[PRODUCT]
+    own_trades = []
+
+    for i, (timestamp, bids, asks, south) in enumerate(ticks):
+        state = _state(timestamp, bids, asks, south, position, own_trades)
+        start = time.perf_counter()
+        if trader.fill_feedback:
+            trader.update_fills(state, pickled_data)
+        conversions, orders = trader.orchid_orders(state, pickled_data)
+        orders = round5.net_orders({PRODUCT: orders}, {PRODUCT: position}, {PRODUCT: conversions})[PRODUCT]
+        elapsed += time.perf_counter() - start
+        round5.logger.logs = ""
+
+        south_buy, south_sell = south_prices(south)
+        if conversions and np.sign(conversions) == -np.sign(position) and abs(conversions) <= abs(position):
+            cash -= conversions * (south_buy if conversions > 0 else south_sell)
+            position += conversions
+            converted += abs(conversions)
+
+        if sum(o.quantity for o in orders if o.quantity > 0) + position > limit:
+            orders = [o for o in orders if o.quantity < 0]
+        if sum(o.quantity for o in orders if o.quantity < 0) + position < -limit:
+            orders = [o for o in orders if o.quantity > 0]
+
+        filled = {}
+        fills = _match(orders, list(asks), 1, filled) + _match(orders, list(bids), -1, filled)
+        if i + 1 < len(ticks):
+            _, next_bids, next_asks, _ = ticks[i + 1]
+            fills += _match(orders, list(next_asks), 1, filled, True) + _match(orders, list(next_bids), -1, filled, True)
+        own_trades = []
+        for price, quantity in fills:
+            position += quantity
+            cash -= price * quantity
+            volume += abs(quantity)
+            buyer, seller = ("SUBMISSION", "") if quantity > 0 else ("", "SUBMISSION")
+            own_trades.append(datamodel.Trade(PRODUCT, price, abs(quantity), buyer, seller, timestamp))
+
+        storage += round5.ORCHID_STORAGE * max(position, 0)
+
+    south_buy, south_sell = south_prices(ticks[-1][3])
+    cash += position * (south_sell if position > 0 else south_buy)
+    return {"pnl": cash - storage, "volume": volume, "converted": converted, "storage": storage,
+            "us_per_tick": elapsed * 1e6 / len(ticks)}
+
+
+def compare(ticks: List[tuple] = None) -> None:
+    """ greedy with its fixed +1 ask, greedy picking the ask from its fill feedback, and one_step """
+    ticks = ticks or load_log()
+    print("{: <16} {: >10} {: >8} {: >10} {: >9} {: >10}".format("planner", "pnl", "volume", "converted", "storage", "us/tick"))
+    for planner, feedback in [("greedy", False), ("greedy", True), ("one_step", False)]:
+        trader = round5.Trader()
+        trader.orchid_planner = planner
+        trader.fill_feedback = feedback
+        row = simulate(trader, ticks)
+        print("{: <16} {: >10.0f} {: >8} {: >10} {: >9.1f} {: >10.1f}".format(
+            planner + (" + feedback" if feedback else ""), row["pnl"], row["volume"], row["converted"], row["storage"], row["us_per_tick"]))
+
+
+if __name__ == "__main__":
+    ticks = load_log()
+    print("ORCHID_FILL = {:.4g}".format(fit_fill(ticks)))
+    compare(ticks)
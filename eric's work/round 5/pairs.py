@@ -0,0 +1,97 @@
+"""
+Fixed weight spreads vs fitted ones for every pair in round5.PAIRS (GIFT_BASKET on its constituents,
+COCONUT_COUPON on COCONUT), over every day we have.
+
+Per pair and day, three spreads:
+- fixed - what trades now: basket_spread (6/4/1 + 400) and coupon_mispricing (Black-Scholes)
+- ols   - one least squares fit of the mids over all the round's days, the best static hedge ratios
+- rls   - round5.rls_path, the online fit (its spread before each tick's update, so no look-ahead)
+
+For each: the hedge ratios, the std, and the AR(1) half-life of the spread in ticks (how fast it mean
+reverts, shorter = more round trips for the threshold strategy).
+
+usage: python pairs.py   (spread stats, then backtest pnl fixed vs rls z-scores)
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+import backtester
+import datasets
+import round5
+from array_book import BookFrame
+
+ROUNDS = {"GIFT_BASKET": 3, "COCONUT_COUPON": 4}
+
+
+def day_mids(round_num: int) -> List[Dict[str, np.ndarray]]:
+    return [{p: f.mid_price for p, f in BookFrame.all_products(datasets.load_prices(path)).items()}
+            for path in datasets.price_files(round_num)]
+
+
+def half_life(spread: np.ndarray) -> float:
+    """ -ln 2 / ln(b) of spread[t] = a + b * spread[t - 1], inf if it doesn't revert """
+    spread = spread[~np.isnan(spread)]
+    b = np.polyfit(spread[:-1], spread[1:], 1)[0]
+    return float(-np.log(2) / np.log(b)) if 0 < b < 1 else np.inf
+
+
+def ols_fit(days: List[Dict[str, np.ndarray]], product: str):
+    """ (intercept, hedge ratios) of the product's mid on its legs, pooled over `days` """
+    legs = round5.PAIRS[product][0]
+    y = np.concatenate([d[product] for d in days])
+    x = np.column_stack([np.concatenate([d[p] for d in days]) for p in legs])
+    ok = ~np.isnan(y) & ~np.isnan(x).any(axis=1)
+    beta = np.linalg.lstsq(np.column_stack((np.ones(ok.sum()), x[ok])), y[ok], rcond=None)[0]
+    return beta[0], beta[1:]
+
+
+def spreads(day: Dict[str, np.ndarray], product: str, ols) -> Dict[str, tuple]:
+    """ {model: (spread, hedge ratios)} of one day """
+    legs, prior, prior_std = round5.PAIRS[product]
+    x = np.column_stack([day[p] for p in legs])
+    if product == "GIFT_BASKET":
+        fixed = (round5.basket_spread(day["GIFT_BASKET"], day["CHOCOLATE"], day["STRAWBERRIES"], day["ROSES"]), prior)
+    else:
+        #no hedge ratio, the coupon is priced off COCONUT through Black-Scholes
+        fixed = (round5.Trader().coupon_mispricing(day["COCONUT_COUPON"], day["COCONUT"]), [])
+    _, rls, coefficients = round5.rls_path(day[product], x, prior, getattr(round5, prior_std))
+    return {
+        "fixed": fixed,
+        "ols": (day[product] - ols[0] - x @ ols[1], ols[1]),
+        "rls": (rls, coefficients[-1, 1:]),
+    }
+
+
+def compare_spreads() -> pd.DataFrame:
+    rows = []
+    for product, round_num in ROUNDS.items():
+        days = day_mids(round_num)
+        ols = ols_fit(days, product)
+        for day_num, day in zip(datasets.days(round_num), days):
+            for model, (spread, ratios) in spreads(day, product, ols).items():
+                rows.append({"product": product, "day": day_num, "model": model,
+                             "ratios": " ".join("{:.3f}".format(r) for r in ratios) or "-",
+                             "std": np.nanstd(spread), "half_life": half_life(spread)})
+    return pd.DataFrame(rows)
+
+
+def compare_pnl() -> None:
+    """ backtest pnl of the traded product per day, thresholds on the fixed spread vs on the rls z-score """
+    print("{: <15} {: <4} {: >10} {: >10}".format("product", "day", "fixed", "rls"))
+    for product, round_num in ROUNDS.items():
+        for day_index, day in enumerate(datasets.days(round_num)):
+            prices, trades = backtester.load_day(round_num, day_index)
+            pnl = []
+            for model in ["fixed", "rls"]:
+                trader = round5.Trader()
+                trader.pairs_model = model
+                pnl.append(backtester.run_backtest(trader, prices, trades).pnl[product][-1])
+            print("{: <15} {: <4} {: >10.0f} {: >10.0f}".format(product, day, *pnl))
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    print(compare_spreads().round(3).to_string(index=False))
+    compare_pnl()
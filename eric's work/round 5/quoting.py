@@ -0,0 +1,138 @@
+"""
+Offline side of the inventory aware quotes in round5.py (as_quotes, Trader.quoting = 'inventory').
+
+Avellaneda-Stoikov: with fair value s, inventory q, risk aversion gamma, fair value volatility sigma
+(per tick) and horizon H ticks,
+
+    reservation = s - q * gamma * sigma^2 * H
+    spread      = gamma * sigma^2 * H + (2 / gamma) * ln(1 + gamma / k)
+
+where k is the decay of the fill intensity lambda(delta) = A * exp(-k * delta) of a quote delta away
+from fair. Here:
+- sigma comes from the changes of the fair value the strategy actually quotes around (the wall mid
+  for STARFRUIT, the mid for AMETHYSTS since its fair value is a constant 10000)
+- A, k come from the trades csvs: lambda(delta) = market trades per tick at least delta away from the
+  mid, fitted log-linearly over the deltas where there are trades
+- gamma and H come from backtests (fit_skew). Only gamma * H moves the skew, so the grid is over gamma and
+  the skew at the position limit in ticks, with H solved from those. Skews under MIN_SKEW are left out:
+  below a tick the quotes hardly move with inventory, the position limit does all the inventory control and
+  the only thing left to win is pennying, which the fixed quotes already do
+
+usage: python quoting.py   (prints AS_PARAMS, quote_gamma and quote_horizon, then backtests fixed vs inventory quotes)
+"""
+from typing import Dict
+
+import numpy as np
+
+import backtester
+import datasets
+import round5
+from array_book import BookFrame
+
+PRODUCTS = ["AMETHYSTS", "STARFRUIT"]
+#quote distances the intensity is fitted over, in ticks from the mid
+DELTAS = np.arange(0.5, 5.01, 0.5)
+#fit_skew grid: gamma, and the reservation price skew at the position limit in ticks
+GAMMAS = (0.03, 0.1, 0.3, 1.0, 3.0)
+SKEWS = (1.0, 1.5, 2.0, 3.0, 4.0)
+MIN_SKEW = 1.0
+
+
+def fit_intensity(round_num: int, product: str, deltas=DELTAS):
+    """ (A, k) of lambda(delta) = A * exp(-k * delta), in trades per tick """
+    counts = np.zeros(len(deltas))
+    ticks = 0
+    for price_path, trade_path in zip(datasets.price_files(round_num), datasets.trade_files(round_num)):
+        frame = BookFrame.from_prices(datasets.load_prices(price_path), product)
+        trades = datasets.load_trades(trade_path)
+        trades = trades[trades["symbol"] == product]
+        idx = np.minimum(np.searchsorted(frame.timestamp, trades["timestamp"].to_numpy()), len(frame) - 1)
+        distance = np.abs(trades["price"].to_numpy() - frame.mid_price[idx])
+        #a quote delta away gets hit by every trade that went at least that far
+        counts += (distance[:, None] >= deltas[None, :]).sum(axis=0)
+        ticks += len(frame)
+
+    rate = counts / ticks
+    ok = rate > 0
+    slope, intercept = np.polyfit(deltas[ok], np.log(rate[ok]), 1)
+    return float(np.exp(intercept)), float(-slope)
+
+
+def fit_sigma(round_num: int, product: str) -> float:
+    """
+    per tick std of the fair value changes. AMETHYSTS' fair value never moves, the only inventory risk
+    there is the mid we get marked at bouncing around, so that one uses the plain mid
+    """
+    changes = []
+    for path in datasets.price_files(round_num):
+        frame = BookFrame.from_prices(datasets.load_prices(path), product)
+        mid = frame.mid_price if product == "AMETHYSTS" else (frame.worst_bid + frame.worst_ask) / 2
+        changes.append(np.diff(mid[~np.isnan(mid)]))
+    return float(np.std(np.concatenate(changes)))
+
+
+def fit_all(round_num: int = 1) -> Dict[str, dict]:
+    out = {}
+    for product in PRODUCTS:
+        a, k = fit_intensity(round_num, product)
+        out[product] = {"sigma": fit_sigma(round_num, product), "A": a, "k": k}
+    return out
+
+
+def skew_horizon(product: str, gamma: float, skew: float) -> float:
+    """ the H that puts the reservation price `skew` ticks off fair at the position limit """
+    return skew / (gamma * round5.AS_PARAMS[product]["sigma"]**2 * round5.POSITION_LIMITS[product])
+
+
+def fit_skew(round_num: int = 1, gammas=GAMMAS, skews=SKEWS):
+    """
+    (gamma, H) per product with the best total backtest pnl over the round's days, every product of
+    PRODUCTS is quoted with the same (gamma, skew) in one backtest
+
+    Returns:
+    - `{product: gamma}`, `{product: H}`
+    """
+    days = [backtester.load_day(round_num, i) for i in range(len(datasets.days(round_num)))]
+    best = {}
+    for gamma in gammas:
+        for skew in (s for s in skews if s >= MIN_SKEW):
+            trader = round5.Trader()
+            trader.quoting = {p: "inventory" for p in PRODUCTS}
+            trader.quote_gamma = {p: gamma for p in PRODUCTS}
+            trader.quote_horizon = {p: skew_horizon(p, gamma, skew) for p in PRODUCTS}
+            pnl = {p: 0.0 for p in PRODUCTS}
+            for day in days:
+                result = backtester.run_backtest(trader, *day)
+                for p in PRODUCTS:
+                    pnl[p] += result.pnl[p][-1]
+            for p in PRODUCTS:
+                if p not in best or pnl[p] > best[p][0]:
+                    best[p] = (pnl[p], gamma, trader.quote_horizon[p])
+    return {p: b[1] for p, b in best.items()}, {p: b[2] for p, b in best.items()}
+
+
+def compare(round_num: int = 1, gamma: Dict[str, float] = None, horizon: Dict[str, float] = None) -> None:
+    """ pnl and inventory variance per day, fixed quotes vs inventory aware quotes (with `gamma`/`horizon` if given) """
+    print("{: <10} {: <4} {: <11} {: >10} {: >10} {: >8}".format("quoting", "day", "product", "pnl", "inv var", "max |q|"))
+    for quoting in ["fixed", "inventory"]:
+        for day_index, day in enumerate(datasets.days(round_num)):
+            trader = round5.Trader()
+            trader.quoting = {p: quoting for p in PRODUCTS}
+            trader.quote_gamma = gamma or trader.quote_gamma
+            trader.quote_horizon = horizon or trader.quote_horizon
+            result = backtester.run_backtest(trader, *backtester.load_day(round_num, day_index))
+            for product, row in result.stats().items():
+                print("{: <10} {: <4} {: <11} {: >10.0f} {: >10.1f} {: >8}".format(
+                    quoting, day, product, row["pnl"], row["inventory_variance"], row["max_abs_position"]))
+
+
+if __name__ == "__main__":
+    params = fit_all()
+    print("AS_PARAMS = {")
+    for product, p in params.items():
+        print("  '{}': {{'sigma': {:.6g}, 'A': {:.6g}, 'k': {:.6g}}},".format(product, p["sigma"], p["A"], p["k"]))
+    print("}")
+    gamma, horizon = fit_skew()
+    print("quote_gamma = {!r}".format(gamma))
+    print("quote_horizon = {!r}".format({p: round(h, 6) for p, h in horizon.items()}))
+    compare(gamma=gamma, horizon=horizon)
@@ -0,0 +1,79 @@
+"""
+Where the volatility regime of the basket spread and the coupon mispricing shifted, day by day, using
+round5.regime_scales (the same fast/slow EWMA variance ratio the live detector keeps in traderData).
+
+A tick is in the 'high' regime when the threshold scale is at least HIGH, 'low' at most 1 / HIGH,
+'normal' otherwise. A change is only reported once the new regime has held for MIN_TICKS, so a single
+jump in the spread doesn't count as a regime.
+
+usage: python regimes.py   (change points, then pnl with fixed vs regime scaled thresholds)
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+import backtester
+import datasets
+import round5
+from array_book import BookFrame
+
+HIGH = 1.5
+MIN_TICKS = 100
+SPREADS = {3: "GIFT_BASKET", 4: "COCONUT_COUPON"}
+
+
+def spread(books: Dict[str, BookFrame], product: str) -> np.ndarray:
+    """ the series the strategy trading `product` thresholds, for a whole day """
+    mid = {p: frame.mid_price for p, frame in books.items()}
+    if product == "GIFT_BASKET":
+        return round5.basket_spread(mid["GIFT_BASKET"], mid["CHOCOLATE"], mid["STRAWBERRIES"], mid["ROSES"])
+    return round5.Trader().coupon_mispricing(mid["COCONUT_COUPON"], mid["COCONUT"])
+
+
+def label(scale: np.ndarray) -> np.ndarray:
+    return np.where(scale >= HIGH, "high", np.where(scale <= 1 / HIGH, "low", "normal"))
+
+
+def change_points(timestamp: np.ndarray, scale: np.ndarray, min_ticks: int = MIN_TICKS) -> pd.DataFrame:
+    """ one row per regime that lasted at least `min_ticks`, with where it started and ended """
+    labels = label(scale)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)]
+    runs = pd.DataFrame({"regime": labels[starts], "start": timestamp[starts], "end": timestamp[ends - 1],
+                         "ticks": ends - starts, "mean_scale": [scale[a:b].mean() for a, b in zip(starts, ends)]})
+    runs = runs[runs["ticks"] >= min_ticks]
+    #short runs dropped above can leave the same regime twice in a row, that's one regime
+    return runs[runs["regime"] != runs["regime"].shift()].reset_index(drop=True)
+
+
+def scan() -> pd.DataFrame:
+    """ `change_points` of every day of rounds 3 and 4 """
+    tables = []
+    for round_num, product in SPREADS.items():
+        for path, day in zip(datasets.price_files(round_num), datasets.days(round_num)):
+            books = BookFrame.all_products(datasets.load_prices(path))
+            scale = round5.regime_scales(spread(books, product))
+            tables.append(change_points(books[product].timestamp, scale).assign(product=product, day=day))
+    return pd.concat(tables, ignore_index=True)
+
+
+def compare() -> None:
+    """ pnl of the spread's product per day with fixed thresholds vs regime scaled ones """
+    print("{: <15} {: <4} {: >10} {: >10}".format("product", "day", "fixed", "regime"))
+    for round_num, product in SPREADS.items():
+        for day_index, day in enumerate(datasets.days(round_num)):
+            prices, trades = backtester.load_day(round_num, day_index)
+            pnl = []
+            for regime in [False, True]:
+                trader = round5.Trader()
+                trader.regime_thresholds = regime
+                pnl.append(backtester.run_backtest(trader, prices, trades).pnl[product][-1])
+            print("{: <15} {: <4} {: >10.0f} {: >10.0f}".format(product, day, *pnl))
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_rows", 500)
+    print(scan().round(3).to_string(index=False))
+    compare()
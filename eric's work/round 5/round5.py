@@ -92,11 +92,399 @@ class Logger:
 
 logger = Logger()
 
+# exchange position limits, the only place they should be written down
+POSITION_LIMITS = {
+  'AMETHYSTS': 20,
+  'STARFRUIT': 20,
+  'ORCHIDS': 100,
+  'CHOCOLATE': 250,
+  'STRAWBERRIES': 350,
+  'ROSES': 60,
+  'GIFT_BASKET': 60,
+  'COCONUT': 300,
+  'COCONUT_COUPON': 600,
+}
+
+# fitted on the round 3 / round 4 data, calibrate.py refits them walk-forward and prints them to paste here
+BASKET_MEAN = 20.525583333333334
+BASKET_STD = 76.4202568412432
+COUPON_STD = 13.530582431810915
+COUPON_VOL = 0.1606393714
+# local level model of the STARFRUIT wall mid (process / observation noise variance), fitted by kalman.py
+STARFRUIT_Q = 0.16538605083525107
+STARFRUIT_R = 0.06854151442244145
+# fair value vol per tick and fill intensity lambda(delta) = A*exp(-k*delta) of a quote delta from fair, fitted by quoting.py
+AS_PARAMS = {
+  'AMETHYSTS': {'sigma': 2.11213, 'A': 0.41818, 'k': 0.525897},
+  'STARFRUIT': {'sigma': 0.549972, 'A': 1.25122, 'k': 1.13891},
+}
+# next wall mid = intercept + coefs . last k wall mids (oldest first), fitted by ar.py on every day we have
+AR_COEFFS = {
+  'AMETHYSTS': (9930.522132, [0.006948]),
+  'STARFRUIT': (0.686254, [0.226525, 0.773339]),
+  'CHOCOLATE': (0.15361, [0.99998]),
+  'GIFT_BASKET': (2.987018, [0.999957]),
+  'ROSES': (4.239284, [0.999706]),
+  'STRAWBERRIES': (0.404731, [0.174491, 0.825409]),
+  'COCONUT': (0.448111, [0.999955]),
+  'COCONUT_COUPON': (0.182654, [0.999709]),
+}
+# ORCHIDS: storage per unit of net long per tick and the chance a passive quote gets filled before the next
+# tick, fitted by orchids.py
+ORCHID_STORAGE = 0.1
+ORCHID_FILL = 0.1333
+
+def set_constants(constants: dict) -> None:
+  """ overrides the fitted constants above, keyed by their names, for calibrate.py's backtests """
+  for name in ['BASKET_MEAN', 'BASKET_STD', 'COUPON_STD', 'COUPON_VOL']:
+    if name in constants:
+      globals()[name] = float(constants[name])
+
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+def norm_cdf(x):
+  """ standard normal cdf for a float or a numpy array """
+  if np.ndim(x) == 0:
+    return NormalDist().cdf(x)
+  return 0.5 * (1 + _erf(np.asarray(x, dtype=float) / math.sqrt(2)).astype(float))
+
+def basket_spread(basket_mid, chocolate_mid, strawberries_mid, roses_mid):
+  """ GIFT_BASKET premium over its constituents, floats or whole-day arrays """
+  return basket_mid - chocolate_mid*4 - strawberries_mid*6 - roses_mid - 400 + BASKET_MEAN
+
+def kalman_update(mean, var, observation, q, r):
+  """
+  One step of a random walk + noise Kalman filter, the whole state is (mean, var) so it fits in traderData.
+  Starts from the first observation when `mean` is None
+  """
+  if mean is None:
+    return observation, r
+  var += q
+  gain = var / (var + r)
+  return mean + gain*(observation - mean), (1 - gain)*var
+
+def ar_predict(buffer: list, head: int, intercept: float, coefs: list) -> float:
+  """
+  AR(k) prediction off a ring buffer of the last k values, `head` is where the oldest one sits.
+  Returns None until the buffer has been filled once
+  """
+  k = len(coefs)
+  total = intercept
+  for i in range(k):
+    value = buffer[(head + i) % k]
+    if value is None:
+      return None
+    total += coefs[i]*value
+  return total
+
+def as_quotes(fair, position, sigma, k, gamma, horizon):
+  """
+  Avellaneda-Stoikov reservation price (fair skewed against our inventory) and half spread.
+  Works on floats (live) or arrays
+  """
+  risk = gamma*sigma**2*horizon
+  reservation = fair - position*risk
+  half_spread = (risk + 2/gamma*np.log(1 + gamma/k))/2
+  return reservation, half_spread
+
+def threshold_signal(value, trade_at):
+  """
+  -1 = sell, 1 = buy, 0 = do nothing. Works on a single float (live) or a whole day of them (batch)
+  """
+  signal = np.where(value > trade_at, -1, np.where(value < -trade_at, 1, 0))
+  return int(signal) if np.ndim(signal) == 0 else signal
+
+# volatility regime of the basket spread / coupon mispricing: EWMA weights of the newest squared change for the
+# fast and slow variance, and how far sqrt(fast / slow) may scale the entry thresholds
+REGIME_FAST = 0.02
+REGIME_SLOW = 0.001
+REGIME_BOUNDS = (0.5, 2.0)
+
+def regime_scale(fast_var, slow_var):
+  """ threshold multiplier for a fast/slow variance pair, 1 until there's a variance to compare to. Floats or arrays """
+  ratio = np.divide(fast_var, slow_var, out=np.ones_like(np.asarray(slow_var, dtype=float)), where=np.asarray(slow_var) > 0)
+  scale = np.clip(np.sqrt(ratio), *REGIME_BOUNDS)
+  return float(scale) if np.ndim(scale) == 0 else scale
+
+def regime_update(regime: list, value: float):
+  """
+  One tick of the regime detector. `regime` is [last value, fast sum, fast weight, slow sum, slow weight]
+  (None on the first tick), small enough for traderData. The sums/weights make it the same bias corrected
+  EWMA as pandas' adjust=True, so the slow variance isn't one squared move for its first few hundred ticks.
+  Returns (regime, threshold scale)
+  """
+  # plain floats, a numpy one pickles into a py/reduce blob in traderData
+  value = float(value)
+  if regime is None:
+    return [value, 0.0, 0.0, 0.0, 0.0], 1.0
+  last, fast_sum, fast_weight, slow_sum, slow_weight = regime
+  move = (value - last)**2
+  fast_sum, fast_weight = (1 - REGIME_FAST)*fast_sum + move, (1 - REGIME_FAST)*fast_weight + 1
+  slow_sum, slow_weight = (1 - REGIME_SLOW)*slow_sum + move, (1 - REGIME_SLOW)*slow_weight + 1
+  return [value, fast_sum, fast_weight, slow_sum, slow_weight], regime_scale(fast_sum/fast_weight, slow_sum/slow_weight)
+
+def regime_scales(values):
+  """
+  regime_update over a whole day at once, the scale every tick would have seen live. NaN ticks (a book was
+  missing) are skipped like live skips them: the next move is taken from the last value we had, and the NaN
+  tick keeps the scale of the tick before it
+  """
+  values = np.asarray(values, dtype=float)
+  scales = np.full(len(values), np.nan)
+  seen = np.flatnonzero(~np.isnan(values))
+  if len(seen) > 0:
+    moves = pd.Series(np.diff(values[seen])**2)
+    fast = moves.ewm(alpha=REGIME_FAST, adjust=True).mean().to_numpy()
+    slow = moves.ewm(alpha=REGIME_SLOW, adjust=True).mean().to_numpy()
+    scales[seen] = np.concatenate(([1.0], regime_scale(fast, slow)))
+  return pd.Series(scales).ffill().fillna(1.0).to_numpy()
+
+# fill feedback: weight an old quote loses each time its offset is quoted again, and the offsets the quoting
+# picks from (STARFRUIT: ticks inside the level it undercuts, ORCHIDS: ticks above the south buy price)
+FILL_DECAY = 0.01
+STARFRUIT_OFFSETS = [0, 1, 2]
+ORCHID_OFFSETS = [1, 2, 3]
+
+def fill_rate(counts) -> float:
+  """ share of a quote that fills, from decayed [filled, sent]. Starts at 1 so every offset gets tried """
+  if counts is None:
+    return 1.0
+  return (counts[0] + 1) / (counts[1] + 1)
+
+# weight of each book level in book_imbalance, best level first
+IMBALANCE_WEIGHTS = [1.0, 0.5, 0.25]
+
+def book_levels(order_depth: OrderDepth, levels: int = 3):
+  """
+  (bid prices, bid volumes, ask prices, ask volumes) of one tick as NaN padded arrays, best level first and
+  ask volumes positive, i.e. one row of array_book.BookFrame. The signal functions below take either
+  """
+  out = [np.full(levels, np.nan) for _ in range(4)]
+  for i, (price, volume) in enumerate(sorted(order_depth.buy_orders.items(), reverse=True)[:levels]):
+    out[0][i], out[1][i] = price, volume
+  for i, (price, volume) in enumerate(sorted(order_depth.sell_orders.items())[:levels]):
+    out[2][i], out[3][i] = price, -volume
+  return out
+
+def microprice(bid, bid_volume, ask, ask_volume):
+  """ best bid/ask weighted by the volume on the other side, leans towards the thinner side. Floats or arrays """
+  return (bid*ask_volume + ask*bid_volume) / (bid_volume + ask_volume)
+
+def book_imbalance(bid_volumes, ask_volumes, weights=IMBALANCE_WEIGHTS):
+  """
+  (bid - ask) / (bid + ask) of the level weighted volumes, in [-1, 1]. Volumes are (levels,) for one tick
+  or (ticks, levels), missing levels NaN
+  """
+  w = np.asarray(weights[:np.shape(bid_volumes)[-1]], dtype=float)
+  bid = np.nansum(np.asarray(bid_volumes, dtype=float)*w, axis=-1)
+  ask = np.nansum(np.asarray(ask_volumes, dtype=float)*w, axis=-1)
+  return (bid - ask) / (bid + ask)
+
+def order_flow_imbalance(prev_bid, prev_bid_volume, prev_ask, prev_ask_volume, bid, bid_volume, ask, ask_volume):
+  """
+  Change in best level volume between two ticks (Cont, Kukanov, Stoikov): a bid that moved up or grew is
+  buying pressure, an ask that moved down or grew is selling pressure. Floats or arrays
+  """
+  bid_flow = np.where(bid >= prev_bid, bid_volume, 0) - np.where(bid <= prev_bid, prev_bid_volume, 0)
+  ask_flow = np.where(ask <= prev_ask, ask_volume, 0) - np.where(ask >= prev_ask, prev_ask_volume, 0)
+  flow = bid_flow - ask_flow
+  return float(flow) if np.ndim(flow) == 0 else flow
+
+def plan_orchids(bids, asks, position, south_buy, south_sell, sell_quote, buy_quote, fill=None, storage=ORCHID_STORAGE, limit=100):
+  """
+  One tick ORCHIDS planner: the best of converting our whole position or not (one conversion a tick, all or
+  nothing, a partial one is never better at a fixed price), then taking levels of one side of the local book
+  and resting what's left of our room at `sell_quote`/`buy_quote`, filled with probability `fill`. Whatever
+  we hold afterwards is valued as converted next tick at today's south prices, after a tick of `storage` per
+  net long unit. Converting is tried first so it wins ties, holding on at the same price is only exposure.
+
+  `bids`/`asks` are [(price, volume)] best first with positive volumes, `south_buy` is what importing a unit
+  costs and `south_sell` what exporting one pays, fees and tariffs included. Either quote can be None.
+
+  Returns (conversion, take, rest) for this tick, signed quantities
+  """
+  fill = ORCHID_FILL if fill is None else fill
+
+  def exit_value(held):
+    return (held*south_sell if held > 0 else held*south_buy) - storage*max(held, 0)
+
+  best, plan = -math.inf, (0, 0, 0)
+  for convert in (True, False):
+    held = 0 if convert else position
+    conversion_cash = (position*south_sell if position > 0 else position*south_buy) if convert else 0.0
+    for levels, sign, quote in [(bids, -1, sell_quote), (asks, 1, buy_quote)]:
+      room = limit - sign*held
+      taken, cash = 0, 0.0
+      for price, volume in [(None, 0)] + levels:
+        if price is not None:
+          if taken >= room:
+            break
+          n = min(volume, room - taken)
+          taken += n
+          cash -= sign*price*n
+        after = held + sign*taken
+        stay = exit_value(after)
+        ev = conversion_cash + cash + stay
+        if ev > best:
+          best, plan = ev, (-position if convert else 0, sign*taken, 0)
+        if quote is not None:
+          rest = room - taken
+          moved = exit_value(after + sign*rest) - sign*quote*rest
+          ev = conversion_cash + cash + fill*moved + (1 - fill)*stay
+          if ev > best:
+            best, plan = ev, (-position if convert else 0, sign*taken, sign*rest)
+  return plan
+
+def net_orders(orders: dict[Symbol, list[Order]], position, conversions: dict = None) -> dict[Symbol, list[Order]]:
+  """
+  Last stage of run(): nets orders at the same price, clips the total buy and sell quantity per product
+  to the position limit and drops zero quantity orders.
+  A product missing from POSITION_LIMITS has no limit to clip to, its orders go through unchanged.
+  The exchange throws away every order of a product if its buys (or sells) could take us past the limit,
+  so trimming the least aggressive prices keeps the rest of the tick's fills.
+  `position` is anything with .get(product, 0): state.position or the tick's RiskSnapshot.
+  `conversions` ({product: quantity}) go through before the orders are matched, so they count too
+  """
+  if conversions is None:
+    conversions = {}
+  netted = {}
+  for product, product_orders in orders.items():
+    if product not in POSITION_LIMITS:
+      netted[product] = product_orders
+      continue
+    by_price = {}
+    for order in product_orders:
+      by_price[order.price] = by_price.get(order.price, 0) + order.quantity
+
+    limit = POSITION_LIMITS[product]
+    held = position.get(product, 0) + conversions.get(product, 0)
+    buy_room = limit - held
+    sell_room = limit + held
+    netted[product] = []
+
+    for price in sorted(by_price, reverse=True): # highest bid first
+      qty = min(by_price[price], buy_room)
+      if qty > 0:
+        netted[product].append(Order(product, price, qty))
+        buy_room -= qty
+
+    for price in sorted(by_price): # lowest ask first
+      qty = min(-by_price[price], sell_room)
+      if qty > 0:
+        netted[product].append(Order(product, price, -qty))
+        sell_room -= qty
+
+  return netted
+
+# fixed order of the arrays in RiskSnapshot, the POSITION_LIMITS order
+RISK_PRODUCTS = list(POSITION_LIMITS)
+RISK_INDEX = {p: i for i, p in enumerate(RISK_PRODUCTS)}
+# units of each constituent inside one GIFT_BASKET
+BASKET_WEIGHTS = {'CHOCOLATE': 4, 'STRAWBERRIES': 6, 'ROSES': 1}
+
+# pairs the RLS engine fits, keyed by the product whose mid is regressed on the others:
+# (legs, starting hedge ratios, name of the constant with the starting residual std). The std is looked up
+# when the fit starts, so set_constants (calibrate.py's walk-forward folds) reaches it too
+PAIRS = {
+  'GIFT_BASKET': (['CHOCOLATE', 'STRAWBERRIES', 'ROSES'], [4.0, 6.0, 1.0], 'BASKET_STD'),
+  'COCONUT_COUPON': (['COCONUT'], [0.5], 'COUPON_STD'), # about the coupon's delta at the money
+}
+# RLS forgetting factor (~1 / (1 - RLS_FORGET) ticks of memory), starting variance of the intercept and of
+# each hedge ratio, and how many ticks before the z-scores are trusted
+RLS_FORGET = 0.9999
+RLS_INTERCEPT_VAR = 100.0
+RLS_WEIGHT_VAR = 0.01
+RLS_WARMUP = 100
+
+def rls_update(pair: list, y: float, x: list, prior: list, prior_std: float):
+  """
+  One tick of recursive least squares of `y` on [1, x] with exponential forgetting. `pair` is
+  [y0, x0, coefficients, covariance, residual var, ticks] as plain lists so it fits in traderData (None on
+  the first tick, which becomes the origin so the regression runs on small numbers). `prior` are the hedge
+  ratios it starts from.
+  Returns (pair, z-score of the spread before this tick's update), z is 0 during RLS_WARMUP
+  """
+  # plain floats all the way, a numpy one pickles into a py/reduce blob in traderData
+  if pair is None:
+    k = len(x)
+    cov = np.diag([RLS_INTERCEPT_VAR] + [RLS_WEIGHT_VAR]*k)
+    return [float(y), [float(v) for v in x], [0.0] + [float(w) for w in prior], cov.tolist(), float(prior_std)**2, 0], 0.0
+  y0, x0, theta, cov, var, ticks = pair
+  phi = np.concatenate(([1.0], np.asarray(x, dtype=float) - x0))
+  theta, cov = np.asarray(theta), np.asarray(cov)
+  spread = float((y - y0) - theta @ phi)
+  cov_phi = cov @ phi
+  gain = cov_phi / (RLS_FORGET + phi @ cov_phi)
+  theta = theta + gain*spread
+  cov = (cov - np.outer(gain, cov_phi)) / RLS_FORGET
+  z = spread / math.sqrt(var) if ticks >= RLS_WARMUP and var > 0 else 0.0
+  var = float(RLS_FORGET*var + (1 - RLS_FORGET)*spread**2)
+  return [y0, x0, theta.tolist(), cov.tolist(), var, ticks + 1], float(z)
+
+def rls_path(y, xs, prior: list, prior_std: float):
+  """
+  rls_update over a whole day: `y` is (ticks,), `xs` (ticks, legs). Returns the z-scores, the raw spreads
+  before each tick's update (NaN until there's a fit, price units, no warm-up zeros) and the (ticks, 1 + legs)
+  coefficients after each tick, intercept first. Ticks with a missing mid are skipped like live
+  """
+  z = np.zeros(len(y))
+  spread = np.full(len(y), np.nan)
+  coefficients = np.full((len(y), len(prior) + 1), np.nan)
+  pair = None
+  for i in range(len(y)):
+    if np.isnan(y[i]) or np.isnan(xs[i]).any():
+      continue
+    if pair is not None:
+      y0, x0, theta = pair[:3]
+      spread[i] = (y[i] - y0) - theta[0] - np.dot(theta[1:], xs[i] - x0)
+    pair, z[i] = rls_update(pair, float(y[i]), xs[i].tolist(), prior, prior_std)
+    coefficients[i] = pair[2]
+  return z, spread, coefficients
+
+class RiskSnapshot:
+  """
+  Everything we hold, worked out once at the top of run() (Trader.risk_snapshot) so the trade_* functions and
+  net_orders don't each go back to state.position. Per product arrays are indexed like RISK_PRODUCTS:
+  - `position`, `mid` (NaN without a book), `notional` (position * mid, 0 without a book)
+  - `constituent_exposure` - CHOCOLATE/STRAWBERRIES/ROSES held directly plus through GIFT_BASKET
+  - `basket_exposure` - seashells of that constituent exposure, i.e. what isn't hedged between basket and legs
+  - `coconut_delta`, `coconut_gamma` - COCONUT plus the coupons in COCONUT equivalents
+  """
+  __slots__ = ['position', 'mid', 'notional', 'constituent_exposure', 'basket_exposure', 'coconut_delta', 'coconut_gamma']
+
+  def __init__(self, position, mid) -> None:
+    self.position = position
+    self.mid = mid
+    self.notional = np.where(np.isnan(mid), 0, position * mid)
+    self.constituent_exposure = np.array([position[RISK_INDEX[p]] + w*position[RISK_INDEX['GIFT_BASKET']] for p, w in BASKET_WEIGHTS.items()])
+    self.basket_exposure = float(np.nansum(self.constituent_exposure * mid[[RISK_INDEX[p] for p in BASKET_WEIGHTS]]))
+    self.coconut_delta = float(position[RISK_INDEX['COCONUT']])
+    self.coconut_gamma = 0.0
+
+  def get(self, product: str, default: int = 0) -> int:
+    """ position lookup that reads like state.position.get """
+    i = RISK_INDEX.get(product)
+    return default if i is None else int(self.position[i])
+
 class PickledData:
   def __init__(self, conversions: int = 0) -> None:
     self.conversions = conversions
     self.starfruit_values = collections.deque()
     self.starfruit_sum = 0
+    self.starfruit_mean = None
+    self.starfruit_var = 0.0
+    self.starfruit_ar = [None]*len(AR_COEFFS['STARFRUIT'][1])
+    self.starfruit_ar_head = 0
+    # best [bid, bid volume, ask, ask volume] per product from the last tick, for order_flow_imbalance
+    self.book_tops = {}
+    # regime_update state per spread, keyed by the product it trades
+    self.regimes = {}
+    # rls_update state per PAIRS entry
+    self.pairs = {}
+    # decayed [filled, sent] per "product side offset", and last tick's passive quotes [product, side, offset, price, quantity]
+    self.fills = {}
+    self.quotes = []
+    self.quotes_at = None
     
   def return_conversions(self) -> int:
     return self.conversions
@@ -106,8 +494,39 @@ class PickledData:
     
 
 class Trader:
-  
-  list_of_starfruit_averages = []
+
+  def __init__(self) -> None:
+    # last 5 STARFRUIT wall mids for the moving average, per instance so one backtest can't leak into the next
+    self.list_of_starfruit_averages = []
+
+  # entry thresholds in multiples of the fitted std, overridable per instance for parameter sweeps
+  basket_trade_at = 0.8
+  coupon_trade_at = 0.5
+  # 'moving_average' of the last 5 wall mids, 'kalman' or 'ar'
+  starfruit_fair = 'moving_average'
+  # per product quotes: 'fixed' (9998/10002 for AMETHYSTS, the undercut logic for STARFRUIT) or 'inventory' (as_quotes).
+  # gamma / horizon fitted by quoting.py: 1 tick of skew at the limit for AMETHYSTS beats fixed on every round 1 day
+  # with a third less inventory variance, STARFRUIT's best skew still loses to fixed on every day
+  quoting = {'AMETHYSTS': 'inventory', 'STARFRUIT': 'fixed'}
+  quote_gamma = {'AMETHYSTS': 0.3, 'STARFRUIT': 0.03}
+  quote_horizon = {'AMETHYSTS': 0.03736, 'STARFRUIT': 5.510203}
+  # delta hedge the coupons with COCONUT inside a no-trade band (hedge_band), bigger risk aversion = narrower band.
+  # The risk aversion is per coupon held: the band is a fixed fraction of the coupons' delta, ~68% at 1e-6,
+  # 15% at 1e-4, 3% at 1e-2.
+  # Off: on round 4 a full hedge cuts the per tick pnl std by ~10% but cost 25k on day 2 and 19k on day 3
+  # (it only made money on day 1, where COCONUT trended), see benchmarks.bench_hedge
+  hedge_coupons = False
+  hedge_risk_aversion = 0.01
+  # products run() computes book_signals for, the result sits in self.signals
+  signal_products = []
+  # 'fixed' (basket_spread / coupon_mispricing over their fitted std) or 'rls' (z-scores of the PAIRS RLS fits)
+  pairs_model = 'fixed'
+  # scale the basket / coupon thresholds by the spread's volatility regime (regime_update)
+  regime_thresholds = False
+  # pick STARFRUIT / greedy ORCHIDS passive prices by edge x fill rate learnt from own_trades
+  fill_feedback = False
+  # ORCHIDS: 'greedy' (trade_orchids, convert last tick's fills) or 'one_step' (plan_orchids)
+  orchid_planner = 'greedy'
   
   def values_extract(self, order_dict, buy=0):
     total_vol = 0
@@ -125,8 +544,35 @@ class Trader:
     
     return total_vol, best_val
   
+  def trade_inventory_quotes(self, product: str, order_depth: OrderDepth, fair: float, position: int) -> list[Order]:
+    """
+    Full size bid and ask around the AS reservation price. A quote that reaches the other side of the book
+    takes it, otherwise it only improves the best price by one tick if the AS price leaves room for that
+    """
+    params = AS_PARAMS[product]
+    reservation, half_spread = as_quotes(fair, position, params['sigma'], params['k'], self.quote_gamma[product], self.quote_horizon[product])
+    bid_pr = math.floor(reservation - half_spread)
+    ask_pr = math.ceil(reservation + half_spread)
+
+    if len(order_depth.buy_orders) > 0 and len(order_depth.sell_orders) > 0:
+      best_bid, best_ask = max(order_depth.buy_orders), min(order_depth.sell_orders)
+      if bid_pr < best_ask:
+        bid_pr = min(bid_pr, best_bid + 1)
+      if ask_pr > best_bid:
+        ask_pr = max(ask_pr, best_ask - 1)
+
+    limit = POSITION_LIMITS[product]
+    orders = []
+    if limit - position > 0:
+      orders.append(Order(product, bid_pr, limit - position))
+    if limit + position > 0:
+      orders.append(Order(product, ask_pr, -limit - position))
+    return orders
+
   def trade_amethysts (self, product: str, order_depth: OrderDepth, position: int , acceptable_bid: int, acceptable_ask: int) -> list[Order]:
     orders: List[Order] = []
+    if self.quoting.get(product) == 'inventory':
+      return self.trade_inventory_quotes(product, order_depth, (acceptable_bid + acceptable_ask)/2, position)
     
     ordered_dict_sell = collections.OrderedDict(sorted(order_depth.sell_orders.items()))
     ordered_dict_buy = collections.OrderedDict(sorted(order_depth.buy_orders.items(), reverse=True))
@@ -240,7 +686,25 @@ class Trader:
 
       return orders
   
-  def trade_starfruit_v2 (self, state: TradingState) -> list[Order]:
+  def starfruit_fair_value(self, mid_price: float, order_depth: OrderDepth, pickled_data: PickledData) -> float:
+    """ fair value the STARFRUIT quotes are built around, from this tick's wall mid (the book is there for overrides) """
+    if self.starfruit_fair == 'kalman':
+      pickled_data.starfruit_mean, pickled_data.starfruit_var = kalman_update(
+        pickled_data.starfruit_mean, pickled_data.starfruit_var, mid_price, STARFRUIT_Q, STARFRUIT_R)
+      return pickled_data.starfruit_mean
+
+    if self.starfruit_fair == 'ar':
+      # overwrite the oldest value, head then points at the next oldest
+      pickled_data.starfruit_ar[pickled_data.starfruit_ar_head] = mid_price
+      pickled_data.starfruit_ar_head = (pickled_data.starfruit_ar_head + 1) % len(pickled_data.starfruit_ar)
+      prediction = ar_predict(pickled_data.starfruit_ar, pickled_data.starfruit_ar_head, *AR_COEFFS['STARFRUIT'])
+      return mid_price if prediction is None else prediction
+
+    self.list_of_starfruit_averages.append(mid_price)
+    if (len(self.list_of_starfruit_averages) > 5): self.list_of_starfruit_averages.pop(0)
+    return sum(self.list_of_starfruit_averages) / len(self.list_of_starfruit_averages)
+
+  def trade_starfruit_v2 (self, state: TradingState, pickled_data: PickledData = None) -> list[Order]:
       #starfruit_order = self.trade_starfruit("STARFRUIT", state.order_depths["STARFRUIT"], state.position.get("STARFRUIT", 0), round(moving_average-1), round(moving_average+1))
       product = "STARFRUIT"
       order_depth = state.order_depths["STARFRUIT"]
@@ -258,9 +722,9 @@ class Trader:
       worst_buy_pr = next(reversed(obuy))
       mid_price = (worst_sell_pr + worst_buy_pr)/2
       
-      self.list_of_starfruit_averages.append(mid_price)
-      if (len(self.list_of_starfruit_averages) > 5): self.list_of_starfruit_averages.pop(0)
-      moving_average = sum(self.list_of_starfruit_averages) / len(self.list_of_starfruit_averages)
+      moving_average = self.starfruit_fair_value(mid_price, order_depth, pickled_data if pickled_data is not None else PickledData())
+      if self.quoting.get(product) == 'inventory':
+        return self.trade_inventory_quotes(product, order_depth, moving_average, position)
       
       # attempt 1:
       acceptable_bid = round(moving_average - 1)
@@ -271,6 +735,17 @@ class Trader:
 
       bid_pr = min(undercut_bid, acceptable_bid) # we will shift this by 1 to beat this price
       sell_pr = max(undercut_ask, acceptable_ask)
+
+      bid_offset, ask_offset = None, None
+      if self.fill_feedback and pickled_data is not None:
+        bids = {o: best_buy_pr + o for o in STARFRUIT_OFFSETS if best_buy_pr + o <= acceptable_bid and best_buy_pr + o < next(iter(osell))}
+        asks = {o: best_sell_pr - o for o in STARFRUIT_OFFSETS if best_sell_pr - o >= acceptable_ask and best_sell_pr - o > next(iter(obuy))}
+        if bids:
+          bid_offset = self.best_offset(product, 'bid', bids, moving_average, pickled_data)
+          bid_pr = bids[bid_offset]
+        if asks:
+          ask_offset = self.best_offset(product, 'ask', asks, moving_average, pickled_data)
+          sell_pr = asks[ask_offset]
       logger.print("STARFRUIT bid price: " + str(bid_pr))
       logger.print("STARFRUIT sell price: " + str(sell_pr))
 
@@ -287,6 +762,8 @@ class Trader:
           num = 20 - cpos
           orders.append(Order(product, bid_pr, num))
           cpos += num
+          if bid_offset is not None:
+            pickled_data.quotes.append([product, 'bid', bid_offset, bid_pr, num])
       
       """ SELLING """
       cpos = position
@@ -302,10 +779,12 @@ class Trader:
         num = -20-cpos
         orders.append(Order(product, sell_pr, num))
         cpos += num
+        if ask_offset is not None:
+          pickled_data.quotes.append([product, 'ask', ask_offset, sell_pr, -num])
 
       return orders
     
-  def trade_orchids (self, product: str, order_depth: OrderDepth, position: int, observation: Observation, conversions: int) -> list[Order]:
+  def trade_orchids (self, product: str, order_depth: OrderDepth, position: int, observation: Observation, conversions: int, pickled_data: PickledData = None) -> list[Order]:
     """
 Summarizing trading microstructure of ORCHIDs:
 1.	ConversionObservation (https://imc-prosperity.notion.site/Writing-an-Algorithm-in-Python-658e233a26e24510bfccf0b1df647858#44efb36257b94733887ae00f46a805f1) shows quotes of ORCHID offered by the ducks from South Archipelago
@@ -381,7 +860,11 @@ Summarizing trading microstructure of ORCHIDs:
     
     if cpos > -100 and rounded_sbp >= highest_buy_price + 1:
       num = -100-cpos
-      orders.append(Order(product, rounded_sbp+1, num))
+      ask_offset = 1
+      if self.fill_feedback and pickled_data is not None:
+        ask_offset = self.best_offset(product, 'ask', {o: rounded_sbp + o for o in ORCHID_OFFSETS}, south_buy_price, pickled_data)
+        pickled_data.quotes.append([product, 'ask', ask_offset, rounded_sbp + ask_offset, -num])
+      orders.append(Order(product, rounded_sbp + ask_offset, num))
       cpos += num
       total_conversions += -num
     # elif cpos > -100: #and rounded_sbp > highest_buy_price:
@@ -410,13 +893,70 @@ Summarizing trading microstructure of ORCHIDs:
     
     return total_conversions, orders
     
-  def trade_basket (self, state: TradingState) -> list[Order]: 
+  def trade_orchids_one_step(self, product: str, order_depth: OrderDepth, position: int, observation: Observation) -> tuple[int, list[Order]]:
+    """
+    plan_orchids turned into a conversion request and orders. Unlike trade_orchids the
+    conversion is for the position we hold now, not for what we expect last tick's orders to have done
+    """
+    south = observation.conversionObservations[product]
+    south_buy = south.askPrice + south.transportFees + south.importTariff
+    south_sell = south.bidPrice - south.transportFees - south.exportTariff
+    bids = sorted(order_depth.buy_orders.items(), reverse=True)
+    asks = [(price, -volume) for price, volume in sorted(order_depth.sell_orders.items())]
+
+    # rest just inside the local book, never at a price the south route makes worthless
+    sell_quote = math.ceil(south_buy) + 1
+    if bids:
+      sell_quote = max(sell_quote, bids[0][0] + 1)
+    buy_quote = math.floor(south_sell) - 1
+    if asks:
+      buy_quote = min(buy_quote, asks[0][0] - 1)
+
+    conversion, take, rest = plan_orchids(bids, asks, position, south_buy, south_sell, sell_quote, buy_quote)
+
+    orders: list[Order] = []
+    levels = bids if take < 0 else asks
+    remaining = abs(take)
+    for price, volume in levels:
+      if remaining <= 0:
+        break
+      fill = min(volume, remaining)
+      orders.append(Order(product, price, fill if take > 0 else -fill))
+      remaining -= fill
+    if rest != 0:
+      orders.append(Order(product, sell_quote if rest < 0 else buy_quote, rest))
+
+    logger.print("ORCHIDS plan: convert " + str(conversion) + " take " + str(take) + " rest " + str(rest))
+    return conversion, orders
+
+  def orchid_orders(self, state: TradingState, pickled_data: PickledData) -> tuple[int, list[Order]]:
+    """ this tick's ORCHIDS conversion request and orders, from whichever `orchid_planner` is on """
+    position = state.position.get("ORCHIDS", 0)
+    if self.orchid_planner == 'one_step':
+      return self.trade_orchids_one_step("ORCHIDS", state.order_depths["ORCHIDS"], position, state.observations)
+
+    conversions = pickled_data.return_conversions()
+    if conversions > position: 
+      conversions = -position
+    new_conversions, orders = self.trade_orchids("ORCHIDS", state.order_depths["ORCHIDS"], position, state.observations, conversions, pickled_data)
+    pickled_data.change_conversions(new_conversions)
+    return conversions, orders
+
+  def threshold_regime(self, product: str, value: float, pickled_data: PickledData) -> float:
+    """ moves `product`'s regime detector on by one tick, returns the threshold scale (1 with regime_thresholds off) """
+    if not self.regime_thresholds or pickled_data is None:
+      return 1.0
+    pickled_data.regimes[product], scale = regime_update(pickled_data.regimes.get(product), value)
+    return scale
+
+  def trade_basket (self, state: TradingState, signal: int = None, pickled_data: PickledData = None) -> list[Order]: 
     orders = {'CHOCOLATE': [], 'ROSES': [], 'STRAWBERRIES': [], 'GIFT_BASKET': []}
     products = ['CHOCOLATE', 'ROSES', 'STRAWBERRIES', 'GIFT_BASKET']
-    position_limit = {'CHOCOLATE': 250, 'ROSES': 350, 'STRAWBERRIES': 60, 'GIFT_BASKET': 60}
+    position_limit = POSITION_LIMITS
     osell, obuy, best_sell, best_buy, worst_sell, worst_buy, mid_price, vol_buy, vol_sell = {}, {}, {}, {}, {}, {}, {}, {}, {}
     
     for p in products:
+      if p not in state.order_depths: return orders
       if len(state.order_depths[p].sell_orders) == 0 or len(state.order_depths[p].buy_orders) == 0: return orders
       
       osell[p] = collections.OrderedDict(sorted(state.order_depths[p].sell_orders.items())) # {12: -3, 11: -2}
@@ -438,28 +978,33 @@ Summarizing trading microstructure of ORCHIDs:
         vol_sell[p] += -vol 
 
 
-    mean = 20.525583333333334
-    STD = 76.4202568412432
-
     # res_buy = mid_price['GIFT_BASKET'] - mid_price['CHOCOLATE']*4 - mid_price['STRAWBERRIES']*6 - mid_price['ROSES'] - 400 + mean
     # res_sell = mid_price['GIFT_BASKET'] - mid_price['CHOCOLATE']*4 - mid_price['STRAWBERRIES']*6 - mid_price['ROSES'] - 400 + mean
     
-    res_price = mid_price['GIFT_BASKET'] - mid_price['CHOCOLATE']*4 - mid_price['STRAWBERRIES']*6 - mid_price['ROSES'] - 400 + mean
-    
-    logger.print("res_price:" + str(res_price))
-    
-    trade_at = STD*0.8
-    close_at = STD*0
+    trade_at = BASKET_STD*self.basket_trade_at
+    close_at = BASKET_STD*0
+
+    # signal comes precomputed for the whole day in batch mode, otherwise work it out from this tick
+    if signal is None:
+      res_price = basket_spread(mid_price['GIFT_BASKET'], mid_price['CHOCOLATE'], mid_price['STRAWBERRIES'], mid_price['ROSES'])
+      scale = self.threshold_regime('GIFT_BASKET', res_price, pickled_data)
+      trade_at, close_at = trade_at*scale, close_at*scale
+      if self.pairs_model == 'rls' and pickled_data is not None:
+        # z-score back in spread units so the same thresholds apply
+        signal = threshold_signal(self.pair_zscore('GIFT_BASKET', mid_price, pickled_data)*BASKET_STD, trade_at)
+      else:
+        signal = threshold_signal(res_price, trade_at)
+      logger.print("res_price:" + str(res_price))
     
     logger.print("trade_at:" + str(trade_at))
     logger.print("best:" + str(best_buy))
     logger.print("worst:" + str(worst_buy))
 
-    if res_price > trade_at: #i will sell
+    if signal == -1: #i will sell
       vol = state.position.get('GIFT_BASKET', 0) + position_limit['GIFT_BASKET']
       if vol > 0:
         orders['GIFT_BASKET'].append(Order('GIFT_BASKET', worst_buy['GIFT_BASKET'], -vol)) 
-    elif res_price < -trade_at: #i will buy
+    elif signal == 1: #i will buy
       vol = position_limit['GIFT_BASKET'] - state.position.get('GIFT_BASKET', 0)
       if vol > 0:
         orders['GIFT_BASKET'].append(Order('GIFT_BASKET', worst_sell['GIFT_BASKET'], vol))
@@ -470,18 +1015,126 @@ Summarizing trading microstructure of ORCHIDs:
       d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * t) / (sigma * np.sqrt(t))
       d2 = d1 - sigma * np.sqrt(t)
       if option_type == 'call':
-          price = S * NormalDist().cdf(d1) - K * np.exp(-r * t) * NormalDist().cdf(d2)
+          price = S * norm_cdf(d1) - K * np.exp(-r * t) * norm_cdf(d2)
       elif option_type == 'put':
-          price = K * np.exp(-r * t) * NormalDist().cdf(-d2) - S * NormalDist().cdf(-d1)
+          price = K * np.exp(-r * t) * norm_cdf(-d2) - S * norm_cdf(-d1)
       return price
 
-  def trade_coconut (self, state: TradingState) -> list[Order]:
+  def coupon_mispricing(self, coupon_mid, coconut_mid):
+    """ market COCONUT_COUPON mid minus its BS value, floats or whole-day arrays """
+    return coupon_mid - self.black_scholes_price(coconut_mid, 10000, 246/252, 0, COUPON_VOL, 'call')
+
+  def coupon_greeks(self, coconut_mid):
+    """ BS delta and gamma of one COCONUT_COUPON per COCONUT, same parameters as coupon_mispricing """
+    t = 246/252
+    d1 = (np.log(coconut_mid / 10000) + 0.5 * COUPON_VOL**2 * t) / (COUPON_VOL * np.sqrt(t))
+    gamma = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi) / (coconut_mid * COUPON_VOL * np.sqrt(t))
+    return norm_cdf(d1), gamma
+
+  def hedge_band(self, half_spread, portfolio_gamma, coupons):
+    """
+    Per coupon Whalley-Wilmott band scaled by the coupons held: half width of the no-trade band around the delta
+    neutral COCONUT position, |coupons| * (3/2 * cost per unit * gamma per coupon^2 / risk aversion)^(1/3).
+    That is |coupons|^(1/3) times the textbook width on the portfolio gamma, (3/2 * cost * portfolio gamma^2 /
+    risk aversion)^(1/3), so `hedge_risk_aversion` is per coupon, not the portfolio's WW risk aversion.
+    The wider the spread the less often we pay it
+    """
+    if coupons == 0:
+      return 0.0
+    return abs(coupons) * (1.5 * half_spread * (portfolio_gamma / coupons)**2 / self.hedge_risk_aversion) ** (1/3)
+
+  def pair_zscore(self, product: str, mid_price: dict, pickled_data: PickledData) -> float:
+    """ moves `product`'s PAIRS fit on by this tick's mids, returns the spread's z-score (0 while warming up) """
+    legs, prior, prior_std = PAIRS[product]
+    pickled_data.pairs[product], z = rls_update(pickled_data.pairs.get(product), mid_price[product], [mid_price[p] for p in legs], prior, globals()[prior_std])
+    return z
+
+  def pair_zscores(self, product: str, mid: dict):
+    """ pair_zscore for a whole day of mids (batch mode) """
+    legs, prior, prior_std = PAIRS[product]
+    return rls_path(mid[product], np.column_stack([mid[p] for p in legs]), prior, globals()[prior_std])[0]
+
+  def update_fills(self, state: TradingState, pickled_data: PickledData) -> None:
+    """ scores last tick's passive quotes against the own_trades they got, then starts a new list for this tick """
+    for product, side, offset, price, quantity in pickled_data.quotes:
+      filled = 0
+      for trade in state.own_trades.get(product, []):
+        if trade.price == price and trade.timestamp == pickled_data.quotes_at and (trade.buyer == "SUBMISSION") == (side == 'bid'):
+          filled += trade.quantity
+      key = product + " " + side + " " + str(offset)
+      counts = pickled_data.fills.get(key, [0.0, 0.0])
+      pickled_data.fills[key] = [(1 - FILL_DECAY)*counts[0] + min(filled, quantity)/quantity, (1 - FILL_DECAY)*counts[1] + 1]
+    pickled_data.quotes = []
+    pickled_data.quotes_at = state.timestamp
+
+  def best_offset(self, product: str, side: str, prices: dict, fair: float, pickled_data: PickledData) -> int:
+    """ the offset out of `prices` ({offset: price}) with the best edge to `fair` times its fill rate so far """
+    best, best_value = None, -math.inf
+    for offset, price in prices.items():
+      edge = fair - price if side == 'bid' else price - fair
+      value = edge*fill_rate(pickled_data.fills.get(product + " " + side + " " + str(offset)))
+      if value > best_value:
+        best, best_value = offset, value
+    return best
+
+  def book_signals(self, product: str, order_depth: OrderDepth, pickled_data: PickledData) -> dict:
+    """
+    microprice, book_imbalance and order_flow_imbalance of one product's book this tick. The only state is
+    the last best level in pickled_data.book_tops, order flow is 0 on the first tick
+    """
+    bid_prices, bid_volumes, ask_prices, ask_volumes = book_levels(order_depth)
+    top = [bid_prices[0], bid_volumes[0], ask_prices[0], ask_volumes[0]]
+    if any(value != value for value in top):
+      return {}
+    prev = pickled_data.book_tops.get(product, top)
+    pickled_data.book_tops[product] = [float(value) for value in top]
+    return {
+      'microprice': float(microprice(*top)),
+      'imbalance': float(book_imbalance(bid_volumes, ask_volumes)),
+      'ofi': order_flow_imbalance(*prev, *top),
+    }
+
+  def risk_snapshot(self, state: TradingState) -> RiskSnapshot:
+    position = np.array([state.position.get(p, 0) for p in RISK_PRODUCTS], dtype=float)
+    mid = np.full(len(RISK_PRODUCTS), np.nan)
+    for p, depth in state.order_depths.items():
+      if p in RISK_INDEX and len(depth.buy_orders) > 0 and len(depth.sell_orders) > 0:
+        mid[RISK_INDEX[p]] = (max(depth.buy_orders) + min(depth.sell_orders))/2
+
+    risk = RiskSnapshot(position, mid)
+    coupons = position[RISK_INDEX['COCONUT_COUPON']]
+    coconut_mid = mid[RISK_INDEX['COCONUT']]
+    if coupons != 0 and coconut_mid == coconut_mid:
+      delta, gamma = self.coupon_greeks(coconut_mid)
+      risk.coconut_delta += float(delta*coupons)
+      risk.coconut_gamma = float(gamma*coupons)
+    return risk
+
+  def coconut_hedge(self, state: TradingState, coconut_bid: int, coconut_ask: int) -> list[Order]:
+    """
+    Brings COCONUT back to the edge of the band when the coupons' delta has drifted outside it.
+    Hedges the coupons we hold now (from the tick's RiskSnapshot), this tick's coupon orders get picked up next tick
+    """
+    coconut_pos = state.position.get('COCONUT', 0)
+    delta = self.risk.coconut_delta
+    band = self.hedge_band((coconut_ask - coconut_bid)/2, self.risk.coconut_gamma, self.risk.get('COCONUT_COUPON'))
+
+    if delta < -band:
+      qty = min(math.ceil(-band - delta), POSITION_LIMITS['COCONUT'] - coconut_pos)
+      return [Order('COCONUT', coconut_ask, qty)] if qty > 0 else []
+    if delta > band:
+      qty = min(math.ceil(delta - band), POSITION_LIMITS['COCONUT'] + coconut_pos)
+      return [Order('COCONUT', coconut_bid, -qty)] if qty > 0 else []
+    return []
+
+  def trade_coconut (self, state: TradingState, signal: int = None, pickled_data: PickledData = None) -> list[Order]:
     orders = {'COCONUT': [], 'COCONUT_COUPON': []}
     products = ['COCONUT', 'COCONUT_COUPON']
-    position_limit = {'COCONUT': 300, 'COCONUT_COUPON': 600}
+    position_limit = POSITION_LIMITS
     osell, obuy, best_sell, best_buy, worst_sell, worst_buy, mid_price, vol_buy, vol_sell = {}, {}, {}, {}, {}, {}, {}, {}, {}
     
     for p in products:
+      if p not in state.order_depths: continue
       if (len(state.order_depths[p].sell_orders) == 0 or len(state.order_depths[p].buy_orders) == 0): continue
 
       osell[p] = collections.OrderedDict(sorted(state.order_depths[p].sell_orders.items())) # {12: -3, 11: -2}
@@ -508,16 +1161,20 @@ Summarizing trading microstructure of ORCHIDs:
     if "COCONUT" in mid_price:
       coco_benchmark = mid_price["COCONUT"] - 10000
       
-    if "COCONUT_COUPON" in mid_price:
+    if "COCONUT_COUPON" in mid_price and "COCONUT" in mid_price:
       #call = self.black_scholes_price(mid_price['COCONUT'], 10000, 248/365, 0, 0.1933295134, 'call')
-      call = self.black_scholes_price(mid_price['COCONUT'], 10000, 246/252, 0, 0.1606393714, 'call')
-      STD = 13.530582431810915
-      trade_at = STD*0.5
+      trade_at = COUPON_STD*self.coupon_trade_at
       
-      coup_benchmark = mid_price["COCONUT_COUPON"] - 637.63
-      call_benchmark = call - 637.63
+      if signal is None:
+        mispricing = self.coupon_mispricing(mid_price["COCONUT_COUPON"], mid_price["COCONUT"])
+        trade_at *= self.threshold_regime('COCONUT_COUPON', mispricing, pickled_data)
+        if self.pairs_model == 'rls' and pickled_data is not None:
+          signal = threshold_signal(self.pair_zscore('COCONUT_COUPON', mid_price, pickled_data)*COUPON_STD, trade_at)
+        else:
+          signal = threshold_signal(mispricing, trade_at)
+        logger.print("mispricing: " + str(mispricing))
       
-      if (coup_benchmark > call_benchmark + trade_at):
+      if signal == -1:
         vol = state.position.get('COCONUT_COUPON', 0) + position_limit['COCONUT_COUPON']
         if vol > 0:# and boolean == True:
           orders['COCONUT_COUPON'].append(Order('COCONUT_COUPON', worst_buy['COCONUT_COUPON'], -vol))
@@ -534,7 +1191,7 @@ Summarizing trading microstructure of ORCHIDs:
         # if coco_vol > 0:
         #   orders['COCONUT'].append(Order('COCONUT', worst_sell['COCONUT'], coco_vol))
           
-      elif (coup_benchmark < call_benchmark - trade_at):
+      elif signal == 1:
         vol = position_limit['COCONUT_COUPON'] - state.position.get('COCONUT_COUPON', 0)
         if vol > 0:# and boolean == False:
           orders['COCONUT_COUPON'].append(Order('COCONUT_COUPON', worst_sell['COCONUT_COUPON'], vol))
@@ -550,8 +1207,9 @@ Summarizing trading microstructure of ORCHIDs:
         # coco_vol = state.position.get('COCONUT', 0) + position_limit['COCONUT']
         # if coco_vol > 0:
           # orders['COCONUT'].append(Order('COCONUT', worst_buy['COCONUT'], -coco_vol))
-      
-      logger.print("buy: " + str(call))
+
+    if self.hedge_coupons and "COCONUT" in mid_price:
+      orders['COCONUT'] += self.coconut_hedge(state, best_buy['COCONUT'], best_sell['COCONUT'])
     
     # diff = 15
     # market_trades = state.market_trades.get("COCONUT_COUPON", [])
@@ -567,11 +1225,46 @@ Summarizing trading microstructure of ORCHIDs:
     
     return orders
 
-  def run(self, state: TradingState) -> tuple[dict[Symbol, list[Order]], int, str]:
+  def vectorized_signals(self, books: dict) -> dict:
+    """
+    Batch mode (backtester only): the per-tick signals of the stateless strategies for a whole day at once.
+    run() then only does the position dependent sizing for each tick.
+
+    Parameters:
+    - `books` - `Dict[str, BookFrame]` for the day, all products on the same timestamps
+
+    Returns:
+    - `Dict[str, np.ndarray]` of -1/0/1 per tick, keyed by the product the signal trades
+    """
+    signals = {}
+    mid = {p: frame.mid_price for p, frame in books.items()}
+
+    if all(p in mid for p in ['GIFT_BASKET', 'CHOCOLATE', 'STRAWBERRIES', 'ROSES']):
+      spread = basket_spread(mid['GIFT_BASKET'], mid['CHOCOLATE'], mid['STRAWBERRIES'], mid['ROSES'])
+      scale = regime_scales(spread) if self.regime_thresholds else 1
+      if self.pairs_model == 'rls':
+        spread = self.pair_zscores('GIFT_BASKET', mid)*BASKET_STD
+      signals['GIFT_BASKET'] = threshold_signal(spread, BASKET_STD*self.basket_trade_at*scale)
+
+    if 'COCONUT' in mid and 'COCONUT_COUPON' in mid:
+      mispricing = self.coupon_mispricing(mid['COCONUT_COUPON'], mid['COCONUT'])
+      scale = regime_scales(mispricing) if self.regime_thresholds else 1
+      if self.pairs_model == 'rls':
+        mispricing = self.pair_zscores('COCONUT_COUPON', mid)*COUPON_STD
+      signals['COCONUT_COUPON'] = threshold_signal(mispricing, COUPON_STD*self.coupon_trade_at*scale)
+
+    return signals
+
+  def run(self, state: TradingState, signals: dict = None) -> tuple[dict[Symbol, list[Order]], int, str]:
     """
     Only method required. It takes all buy and sell orders for all symbols as an input,
     and outputs a list of orders to be sent
+
+    `signals` is only passed by the backtester in batch mode (this tick's row of `vectorized_signals`)
     """
+    if signals is None:
+      signals = {}
+
     result = {}
     conversions = 0
     trader_data = ""
@@ -580,10 +1273,18 @@ Summarizing trading microstructure of ORCHIDs:
       pickled_data = jsonpickle.decode(state.traderData)
     else:
       pickled_data = PickledData()
+
+    if self.fill_feedback:
+      self.update_fills(state, pickled_data)
+
+    # what we hold across every product, read by the strategies below instead of recomputing it
+    self.risk = self.risk_snapshot(state)
+    self.signals = {p: self.book_signals(p, state.order_depths[p], pickled_data) for p in self.signal_products if p in state.order_depths}
     
     # # product = "AMETHYSTS"
-    amethyst_order = self.trade_amethysts("AMETHYSTS", state.order_depths["AMETHYSTS"], state.position.get("AMETHYSTS", 0), 10000, 10000)
-    result["AMETHYSTS"] = amethyst_order
+    if "AMETHYSTS" in state.order_depths:
+      amethyst_order = self.trade_amethysts("AMETHYSTS", state.order_depths["AMETHYSTS"], state.position.get("AMETHYSTS", 0), 10000, 10000)
+      result["AMETHYSTS"] = amethyst_order
     
     """
     # #! product = "STARFRUIT" v1
@@ -600,34 +1301,29 @@ Summarizing trading microstructure of ORCHIDs:
     """
     
     # #! product = "STARFRUIT" v2
-    starfruit_order = self.trade_starfruit_v2(state)
-    
-    result["STARFRUIT"] = starfruit_order
+    if "STARFRUIT" in state.order_depths:
+      starfruit_order = self.trade_starfruit_v2(state, pickled_data)
+      
+      result["STARFRUIT"] = starfruit_order
 
     # # product = "ORCHIDS"
-    conversions = pickled_data.return_conversions()
-    
-    if conversions > state.position.get("ORCHIDS", 0): 
-      conversions = -state.position.get("ORCHIDS", 0)
-      
-    new_conversions, orchid_order = self.trade_orchids("ORCHIDS", state.order_depths["ORCHIDS"], state.position.get("ORCHIDS", 0), state.observations, conversions)
-    result["ORCHIDS"] = orchid_order
-    
-    pickled_data.change_conversions(new_conversions)
+    if "ORCHIDS" in state.order_depths and "ORCHIDS" in state.observations.conversionObservations:
+      conversions, result["ORCHIDS"] = self.orchid_orders(state, pickled_data)
       
     # product = "GIFT_BASKETS"
-    basket_order = self.trade_basket(state)
+    basket_order = self.trade_basket(state, signals.get('GIFT_BASKET'), pickled_data)
     result['GIFT_BASKET'] = basket_order['GIFT_BASKET']
     result['ROSES'] = basket_order['ROSES']
     result['STRAWBERRIES'] = basket_order['STRAWBERRIES']
     result['CHOCOLATE'] = basket_order['CHOCOLATE']
     
     # product = "COCONUT"
-    coconut_order = self.trade_coconut(state)
+    coconut_order = self.trade_coconut(state, signals.get('COCONUT_COUPON'), pickled_data)
     result['COCONUT_COUPON'] = coconut_order['COCONUT_COUPON']
     result['COCONUT'] = coconut_order['COCONUT']
       
     trader_data = jsonpickle.encode(pickled_data)
     
+    result = net_orders(result, self.risk, {"ORCHIDS": conversions})
     logger.flush(state, result, conversions, trader_data)
     return result, conversions, trader_data
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Successive halving over Trader settings (basket_trade_at, coupon_trade_at, ...).
+
+Every configuration is first backtested on a short prefix of the first day. The best 1/eta of them
+move on to a budget eta times longer, spilling over into the next days once a day is used up, until
+the survivors have seen every day. Bad thresholds are usually obvious after a few thousand ticks, so
+most of the full grid is never run.
+
+One Pool is shared by every rung (and every search in `__main__`), and each worker keeps the days it
+has loaded, so the csvs are only parsed once per worker. Days are independent (everything starts
+flat), so a day a configuration already finished is never replayed in a later rung.
+
+usage: python search.py [processes]
+"""
+import itertools
+import multiprocessing
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+import backtester
+import datasets
+import round5
+
+#per worker: (round, day index) -> (prices, trades)
+_DAYS = {}
+
+
+def _load(round_num: int, day_index: int):
+    key = (round_num, day_index)
+    if key not in _DAYS:
+        _DAYS[key] = backtester.load_day(round_num, day_index)
+    return _DAYS[key]
+
+
+def _run_segment(task):
+    """ pnl of `product` after the first `ticks` ticks of one day, for one configuration """
+    trader_cls, config, round_num, day_index, ticks, product = task
+    trader = trader_cls()
+    for attr, value in config.items():
+        setattr(trader, attr, value)
+    prices, trades = _load(round_num, day_index)
+    return float(backtester.run_backtest(trader, prices, trades, max_ticks=ticks).pnl[product][-1])
+
+
+def grid(**values) -> List[dict]:
+    """ every combination, e.g. grid(basket_trade_at=[0.4, 0.8], coupon_trade_at=[0.5]) """
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*values.values())]
+
+
+def _horizon(budget: int, day_ticks: List[int]) -> List[int]:
+    """ ticks to run on each day for a total budget, filling days in order """
+    out = []
+    for n in day_ticks:
+        out.append(min(budget, n))
+        budget -= out[-1]
+    return out
+
+
+def successive_halving(trader_cls, configs: List[dict], round_num: int, product: str, pool,
+                       min_ticks: int = 1000, eta: int = 2) -> dict:
+    """
+    Parameters:
+    - `trader_cls` - Trader class, each configuration's items are set as attributes on a fresh instance
+    - `configs` - list of attribute dicts, see `grid`
+    - `round_num`, `product` - which days to replay and whose pnl to rank on
+    - `pool` - multiprocessing.Pool reused for every rung
+    - `min_ticks` - budget of the first rung, in ticks
+    - `eta` - keep 1/eta of the configurations and multiply the budget by eta each rung
+
+    Returns:
+    - dict with `best` (config), `score` (its pnl over every day), `rungs` (per rung: budget, configs, scores),
+      `ticks` (ticks simulated) and `full_ticks` (ticks the full grid would have simulated)
+    """
+    day_ticks = [_load(round_num, d)[0]["timestamp"].nunique() for d in range(len(datasets.days(round_num)))]
+    total = sum(day_ticks)
+    #(config index, day index) -> ticks, pnl of the longest run so far
+    done: Dict[tuple, tuple] = {}
+    alive = list(range(len(configs)))
+    budget = min_ticks
+    rungs = []
+    simulated = 0
+
+    while True:
+        budget = min(budget, total)
+        horizon = _horizon(budget, day_ticks)
+        tasks, keys = [], []
+        for c in alive:
+            for d, ticks in enumerate(horizon):
+                if ticks == 0 or done.get((c, d), (0,))[0] == ticks:
+                    continue
+                tasks.append((trader_cls, configs[c], round_num, d, ticks, product))
+                keys.append((c, d, ticks))
+        for (c, d, ticks), pnl in zip(keys, pool.map(_run_segment, tasks)):
+            done[(c, d)] = (ticks, pnl)
+            simulated += ticks
+
+        scores = np.array([sum(done[(c, d)][1] for d, ticks in enumerate(horizon) if ticks > 0) for c in alive])
+        rungs.append({"budget": budget, "configs": [configs[c] for c in alive], "scores": scores})
+        if budget == total:
+            break
+
+        #stable sort so ties keep grid order
+        keep = max(1, len(alive) // eta)
+        alive = [alive[i] for i in np.argsort(-scores, kind="stable")[:keep]]
+        budget *= eta
+
+    best = int(np.argmax(scores))
+    return {"best": configs[alive[best]], "score": float(scores[best]), "rungs": rungs,
+            "ticks": simulated, "full_ticks": len(configs) * total}
+
+
+def report(result: dict) -> None:
+    for rung in result["rungs"]:
+        print("budget {: >6} ticks   {: >3} configs   best {: >10.0f}".format(rung["budget"], len(rung["configs"]), rung["scores"].max()))
+    print("best {}  pnl {:.0f}".format(result["best"], result["score"]))
+    print("simulated {} ticks vs {} for the full grid ({:.0%} saved)".format(
+        result["ticks"], result["full_ticks"], 1 - result["ticks"] / result["full_ticks"]))
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    thresholds = np.round(np.arange(0.2, 2.01, 0.1), 2).tolist()
+    with multiprocessing.Pool(processes) as pool:
+        for attr, round_num, product in [("basket_trade_at", 3, "GIFT_BASKET"), ("coupon_trade_at", 4, "COCONUT_COUPON")]:
+            print(attr)
+            report(successive_halving(round5.Trader, grid(**{attr: thresholds}), round_num, product, pool))
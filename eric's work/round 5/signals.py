@@ -0,0 +1,73 @@
+"""
+How much the book signals in round5.py (microprice, book_imbalance, order_flow_imbalance) say about the
+next tick's mid. The same functions the live code calls per tick are called here on whole days of
+BookFrame arrays, so what gets measured is exactly what would be traded.
+
+For every (product, signal): correlation with the next mid change, the R^2 of that one regressor, and the
+hit rate, how often the sign is right on ticks where both the signal and the mid move. Days are pooled,
+changes never cross from one day into the next.
+
+usage: python signals.py
+"""
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+import datasets
+import round5
+from array_book import BookFrame
+
+#ORCHIDS books only exist for one round 2 day
+ORCHIDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "round 2", "round 2 data", "only_useful_data.csv")
+PRODUCTS = {
+    1: ["STARFRUIT"],
+    3: ["CHOCOLATE", "STRAWBERRIES", "ROSES", "GIFT_BASKET"],
+}
+
+
+def day_signals(frame: BookFrame) -> Dict[str, np.ndarray]:
+    """ every signal of one day, aligned with the change of the mid from this tick to the next """
+    mid = frame.mid_price
+    top = (frame.bid_price[:, 0], frame.bid_volume[:, 0], frame.ask_price[:, 0], frame.ask_volume[:, 0])
+    prev = tuple(np.concatenate(([x[0]], x[:-1])) for x in top)
+    return {
+        "microprice": round5.microprice(*top) - mid,
+        "imbalance_l1": round5.book_imbalance(frame.bid_volume[:, :1], frame.ask_volume[:, :1]),
+        "imbalance": round5.book_imbalance(frame.bid_volume, frame.ask_volume),
+        "ofi": round5.order_flow_imbalance(*prev, *top),
+        "next_move": np.append(mid[1:] - mid[:-1], np.nan),
+    }
+
+
+def score(days: List[Dict[str, np.ndarray]]) -> pd.DataFrame:
+    """ correlation, R^2 and hit rate of each signal against next_move, pooled over `days` """
+    pooled = {k: np.concatenate([d[k] for d in days]) for k in days[0]}
+    target = pooled.pop("next_move")
+    rows = []
+    for name, signal in pooled.items():
+        ok = ~np.isnan(signal) & ~np.isnan(target)
+        corr = np.corrcoef(signal[ok], target[ok])[0, 1]
+        moved = ok & (signal != 0) & (target != 0)
+        rows.append({"signal": name, "corr": corr, "r2": corr**2,
+                     "hit_rate": np.mean(np.sign(signal[moved]) == np.sign(target[moved])), "ticks": int(ok.sum())})
+    return pd.DataFrame(rows)
+
+
+def frames(product: str, round_num: int = None) -> List[BookFrame]:
+    """ one BookFrame per day of `product`, ORCHIDS from the round 2 file """
+    if product == "ORCHIDS":
+        return [BookFrame.from_prices(datasets.load_prices(ORCHIDS_FILE), product)]
+    return [BookFrame.from_prices(datasets.load_prices(p), product) for p in datasets.price_files(round_num)]
+
+
+def evaluate() -> pd.DataFrame:
+    jobs = [(product, round_num) for round_num, products in PRODUCTS.items() for product in products] + [("ORCHIDS", None)]
+    tables = [score([day_signals(f) for f in frames(product, round_num)]).assign(product=product) for product, round_num in jobs]
+    return pd.concat(tables, ignore_index=True)[["product", "signal", "corr", "r2", "hit_rate", "ticks"]]
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    print(evaluate().round(4).to_string(index=False))
@@ -0,0 +1,131 @@
+"""
+Pieces of round5.py the backtests don't pin down on their own:
+- net_orders, the last stage of Trader.run: netting, clipping to POSITION_LIMITS, conversions
+- the volatility regime detector, live (regime_update) against batch (regime_scales)
+
+usage: python -m pytest -q test_round5.py
+"""
+import jsonpickle
+import numpy as np
+
+from datamodel import Order
+
+import round5
+
+
+def quantities(orders):
+    return [(o.price, o.quantity) for o in orders]
+
+
+def test_same_price_orders_are_netted():
+    orders = {"AMETHYSTS": [Order("AMETHYSTS", 9998, 3), Order("AMETHYSTS", 9998, 2), Order("AMETHYSTS", 10002, -4),
+                            Order("AMETHYSTS", 10002, 4), Order("AMETHYSTS", 10004, -1)]}
+    netted = round5.net_orders(orders, {})["AMETHYSTS"]
+    #the two 10002 orders cancel out and are dropped
+    assert quantities(netted) == [(9998, 5), (10004, -1)]
+
+
+def test_least_aggressive_prices_are_clipped_first():
+    orders = {"STARFRUIT": [Order("STARFRUIT", 5000, 10), Order("STARFRUIT", 5002, 10), Order("STARFRUIT", 5001, 10),
+                            Order("STARFRUIT", 5005, -10), Order("STARFRUIT", 5004, -10)]}
+    netted = round5.net_orders(orders, {"STARFRUIT": 5})["STARFRUIT"]
+    #15 to buy before the limit of 20, 25 to sell
+    assert quantities(netted) == [(5002, 10), (5001, 5), (5004, -10), (5005, -10)]
+    assert sum(q for _, q in quantities(netted) if q > 0) + 5 <= round5.POSITION_LIMITS["STARFRUIT"]
+
+
+def test_conversions_count_before_the_orders():
+    limit = round5.POSITION_LIMITS["ORCHIDS"]
+    orders = {"ORCHIDS": [Order("ORCHIDS", 1100, limit), Order("ORCHIDS", 1102, -limit)]}
+    #short 60, converting 60 back flattens us, so the whole limit is free on both sides
+    netted = round5.net_orders(orders, {"ORCHIDS": -60}, {"ORCHIDS": 60})["ORCHIDS"]
+    assert quantities(netted) == [(1100, limit), (1102, -limit)]
+    #without the conversion only 40 can be sold
+    netted = round5.net_orders(orders, {"ORCHIDS": -60})["ORCHIDS"]
+    assert quantities(netted) == [(1100, limit), (1102, -40)]
+
+
+def test_product_without_a_limit_goes_through():
+    orders = {"NEW_PRODUCT": [Order("NEW_PRODUCT", 10, 5), Order("NEW_PRODUCT", 10, 5)]}
+    assert quantities(round5.net_orders(orders, {})["NEW_PRODUCT"]) == [(10, 5), (10, 5)]
+
+
+def live_scales(values):
+    """ regime_update tick by tick, NaN ticks skipped the way trade_basket / trade_coconut skip a missing book """
+    regime, scale, scales = None, 1.0, []
+    for value in values:
+        if not np.isnan(value):
+            regime, scale = round5.regime_update(regime, value)
+        scales.append(scale)
+    return regime, np.array(scales)
+
+
+def calm_then_wild(seed=0):
+    """ 2000 ticks of +-1 moves, 500 of +-10, then 2000 of +-1 again """
+    rng = np.random.default_rng(seed)
+    moves = np.concatenate((rng.choice([-1.0, 1.0], 2000), rng.choice([-10.0, 10.0], 500), rng.choice([-1.0, 1.0], 2000)))
+    return np.cumsum(moves)
+
+
+def test_detector_goes_high_then_low():
+    _, scales = live_scales(calm_then_wild())
+    low, high = round5.REGIME_BOUNDS
+    #calm: the fast and slow variance agree
+    assert abs(scales[1999] - 1) < 0.2
+    #the jump in volatility widens the thresholds up to the bound, until the slow variance catches up
+    assert scales[2100] == high
+    assert scales[2499] < high
+    #back to calm while the slow variance still remembers the wild stretch, thresholds narrow
+    assert scales[2700] == low
+
+
+def test_batch_matches_live_through_gaps():
+    values = calm_then_wild()
+    values[[0, 5, 6, 2100, 2101, 2102, 3000]] = np.nan
+    _, live = live_scales(values)
+    np.testing.assert_allclose(round5.regime_scales(values), live)
+
+
+def test_state_is_plain_floats():
+    regime, _ = live_scales(np.float64(100) + calm_then_wild()[:10])
+    assert all(type(x) is float for x in regime)
+    assert "py/reduce" not in jsonpickle.encode(regime)
+
+
+def test_rls_state_is_plain_floats():
+    pair = None
+    for i in range(5):
+        pair, z = round5.rls_update(pair, np.float64(100 + i), [np.float64(50 + i)], [0.5], np.float64(13.5))
+    assert type(z) is float and type(pair[0]) is float and type(pair[4]) is float
+    assert "py/reduce" not in jsonpickle.encode(pair)
+
+
+def test_rls_path_spread_is_the_raw_spread_behind_z():
+    rng = np.random.default_rng(1)
+    x = 100 + np.cumsum(rng.normal(size=(400, 1)), axis=0)
+    y = 0.5 * x[:, 0] + rng.normal(size=400)
+    z, spread, _ = round5.rls_path(y, x, [0.5], 1.0)
+    assert np.isnan(spread[0])
+    #past the warm-up z is that spread over the residual std the fit had before the tick
+    pair = None
+    for i in range(len(y)):
+        var = pair[4] if pair is not None else None
+        pair, _ = round5.rls_update(pair, float(y[i]), x[i].tolist(), [0.5], 1.0)
+        if i > round5.RLS_WARMUP:
+            assert abs(z[i] * np.sqrt(var) - spread[i]) < 1e-9
+
+
+def test_pair_zscores_follow_set_constants():
+    rng = np.random.default_rng(2)
+    coconut = 10000 + np.cumsum(rng.normal(size=300))
+    mid = {"COCONUT": coconut, "COCONUT_COUPON": 600 + 0.5 * (coconut - 10000) + rng.normal(size=300)}
+    trader = round5.Trader()
+    before = trader.pair_zscores("COCONUT_COUPON", mid)
+    current = round5.COUPON_STD
+    round5.set_constants({"COUPON_STD": current * 2})
+    try:
+        after = trader.pair_zscores("COCONUT_COUPON", mid)
+    finally:
+        round5.set_constants({"COUPON_STD": current})
+    #a different starting residual std has to change the z-scores, it isn't frozen at import
+    assert not np.allclose(before, after)
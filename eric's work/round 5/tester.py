@@ -19,6 +19,18 @@ import collections
 
 import sys
 
+#this file is uploaded on its own, so these mirror round5.POSITION_LIMITS
+POSITION_LIMITS = {
+    "AMETHYSTS": 20,
+    "STARFRUIT": 20,
+    "ORCHIDS": 100,
+    "CHOCOLATE": 250,
+    "STRAWBERRIES": 350,
+    "ROSES": 60,
+    "GIFT_BASKET": 60,
+    "COCONUT": 300,
+    "COCONUT_COUPON": 600,
+}
 
 class Logger:
     def __init__(self) -> None:
@@ -162,7 +174,7 @@ class Trader:
             x = np.arange(0, n, 1)  
             y = np.array(past_prices) 
             poly_coeffs = np.polyfit(x, y, deg=1)
-            next_price = np.polyval(poly_coeffs, n+1)
+            next_price = np.polyval(poly_coeffs, n) # x runs 0..n-1, so the next tick is n
             return next_price
 
     def shadow_orders(self, state, symbol, mid_p):
@@ -317,7 +329,7 @@ class Trader:
         buy_volume_avail = pos_limit - starting_pos
         sell_volume_avail = abs(-pos_limit - starting_pos)
 
-        assert buy_volume_avail+sell_volume_avail == 40 and buy_volume_avail <= 40 and sell_volume_avail <= 40, "someting wrong"
+        assert buy_volume_avail+sell_volume_avail == 2*pos_limit and buy_volume_avail <= 2*pos_limit and sell_volume_avail <= 2*pos_limit, "someting wrong"
     
         #Market taking starting with lowest ask, here we are doing BUYING (if the price is below buy_signal)
         for ask, avolume in ob_asks.items():
@@ -589,10 +601,10 @@ class Trader:
         strawb_orders = []
         choc_orders = []
         rose_orders = []
-        basket_pos_limit = 60
-        strawb_pos_limit = 350
-        choc_pos_limit = 250
-        rose_pos_limit = 60
+        basket_pos_limit = POSITION_LIMITS["GIFT_BASKET"]
+        strawb_pos_limit = POSITION_LIMITS["STRAWBERRIES"]
+        choc_pos_limit = POSITION_LIMITS["CHOCOLATE"]
+        rose_pos_limit = POSITION_LIMITS["ROSES"]
 
         #hyperparam
         reserve_pct = 0.1
@@ -605,8 +617,8 @@ class Trader:
         current_basket_pos = state.position.get("GIFT_BASKET", 0)
         basket_buy_vol = basket_pos_limit*reserves - current_basket_pos
         basket_sell_vol = abs(-(basket_pos_limit*reserves) - current_basket_pos)
-        basket_buy_vol_ext = 60 - current_basket_pos
-        basket_sell_vol_ext = abs(-60- current_basket_pos)
+        basket_buy_vol_ext = basket_pos_limit - current_basket_pos
+        basket_sell_vol_ext = abs(-basket_pos_limit - current_basket_pos)
         _,basket_best_bid,_ = self.calc_metrics_bids(state.order_depths["GIFT_BASKET"].buy_orders) #buying at the ask
         _,basket_best_ask,_ = self.calc_metrics_asks(state.order_depths["GIFT_BASKET"].sell_orders)
          #selling at the bid
@@ -614,24 +626,24 @@ class Trader:
         current_strawb_pos = state.position.get("STRAWBERRIES", 0) 
         strawb_buy_vol = strawb_pos_limit*reserves - current_strawb_pos 
         strawb_sell_vol = abs(-(strawb_pos_limit*reserves) - current_strawb_pos)
-        strawb_buy_vol_ext = 350 - current_strawb_pos 
-        strawb_sell_vol_ext = abs(-350 - current_strawb_pos)
+        strawb_buy_vol_ext = strawb_pos_limit - current_strawb_pos 
+        strawb_sell_vol_ext = abs(-strawb_pos_limit - current_strawb_pos)
         _,strawb_highest_bid,_ = self.calc_metrics_bids(state.order_depths["STRAWBERRIES"].buy_orders)
         _,strawb_lowest_ask,_ = self.calc_metrics_asks(state.order_depths["STRAWBERRIES"].sell_orders)
 
         current_choc_pos = state.position.get("CHOCOLATE", 0) 
         choc_buy_vol = choc_pos_limit*reserves - current_choc_pos
         choc_sell_vol = abs(-(choc_pos_limit*reserves) - current_choc_pos)
-        choc_buy_vol_ext = 250 - current_choc_pos
-        choc_sell_vol_ext = abs(-250 - current_choc_pos)
+        choc_buy_vol_ext = choc_pos_limit - current_choc_pos
+        choc_sell_vol_ext = abs(-choc_pos_limit - current_choc_pos)
         _,choc_highest_bid,_ = self.calc_metrics_bids(state.order_depths["CHOCOLATE"].buy_orders)
         _,choc_lowest_ask,_ = self.calc_metrics_asks(state.order_depths["CHOCOLATE"].sell_orders)
 
         current_rose_pos = state.position.get("ROSES", 0) 
         rose_buy_vol = (rose_pos_limit*reserves) - current_rose_pos
         rose_sell_vol = abs(-(rose_pos_limit*reserves) - current_rose_pos)
-        rose_buy_vol_ext = 60 - current_rose_pos
-        rose_sell_vol_ext = abs(-60 - current_rose_pos)
+        rose_buy_vol_ext = rose_pos_limit - current_rose_pos
+        rose_sell_vol_ext = abs(-rose_pos_limit - current_rose_pos)
         _,rose_highest_bid,_ = self.calc_metrics_bids(state.order_depths["ROSES"].buy_orders)
         _,rose_lowest_ask,_ = self.calc_metrics_asks(state.order_depths["ROSES"].sell_orders)
 
@@ -710,8 +722,8 @@ class Trader:
     #COCONUT and COCONUT_COUPON
     def order_gen_COCONUT(self,state):
         coconut_pos = state.position.get("COCONUT", 0)
-        coconut_limit = 270
-        coconut_limit_ext = 300
+        coconut_limit_ext = POSITION_LIMITS["COCONUT"]
+        coconut_limit = int(coconut_limit_ext*0.9)
         coconut_orders = []
         coconut_buy_volume_avail = coconut_limit - coconut_pos
         coconut_sell_volume_avail = abs(-coconut_limit - coconut_pos)
@@ -723,8 +735,8 @@ class Trader:
         coconut_midprice = (coconut_best_ask+coconut_best_bid)/2
 
         coupon_pos = state.position.get("COCONUT_COUPON",0)
-        coupon_limit = 540
-        coupon_limit_ext = 600
+        coupon_limit_ext = POSITION_LIMITS["COCONUT_COUPON"]
+        coupon_limit = int(coupon_limit_ext*0.9)
         coupon_orders = []
         coupon_buy_volume_avail = coupon_limit - coupon_pos
         coupon_sell_volume_avail = abs(-coupon_limit - coupon_pos)
@@ -801,8 +813,8 @@ class Trader:
             # if product == "AMETHYSTS":
             #     current_am_pos = state.position.get("AMETHYSTS", 0)
             #     mp_price_history = self.update_prev_prices(state, mp_price_history, product)
-            #     pos_after_mt, buy_vol_remain, sell_vol_remain, orders_MT = self.order_gen_AMETHYSTS_MT(order_depth, current_am_pos, 20, 10000)
-            #     orders_MM = self.order_gen_AMETHYSTS_MM(order_depth, pos_after_mt, buy_vol_remain, sell_vol_remain, 20, 10000)
+            #     pos_after_mt, buy_vol_remain, sell_vol_remain, orders_MT = self.order_gen_AMETHYSTS_MT(order_depth, current_am_pos, POSITION_LIMITS[product], 10000)
+            #     orders_MM = self.order_gen_AMETHYSTS_MM(order_depth, pos_after_mt, buy_vol_remain, sell_vol_remain, POSITION_LIMITS[product], 10000)
             #     orders = orders_MT + orders_MM
             #     result[product] = orders
 
@@ -811,7 +823,7 @@ class Trader:
             #     mp_price_history = self.update_prev_prices(state, mp_price_history, product)
             #     star_signal = self.calc_regression(mp_price_history[product])
 
-            #     pos_after_mt, buy_vol_remain, sell_vol_remain, orders_MT = self.order_gen_STARFRUIT_MT(state, order_depth, current_star_pos, 20)
+            #     pos_after_mt, buy_vol_remain, sell_vol_remain, orders_MT = self.order_gen_STARFRUIT_MT(state, order_depth, current_star_pos, POSITION_LIMITS[product])
             #     orders_MM = self.order_gen_STARFRUIT_MM(state, order_depth, pos_after_mt, buy_vol_remain, sell_vol_remain, star_signal)
                 
             #     orders = orders_MT + orders_MM
@@ -820,7 +832,7 @@ class Trader:
 
             # if product == "ORCHIDS":
             #     current_orch_pos = state.position.get("ORCHIDS", 0) 
-            #     orders = self.arb_orders_ORCHID(state, current_orch_pos, 100)
+            #     orders = self.arb_orders_ORCHID(state, current_orch_pos, POSITION_LIMITS[product])
             #     conversions = current_orch_pos*-1
             #     result[product] = orders
 